@@ -1,59 +1,94 @@
 import dataclasses
-import json
-from datetime import datetime
+import sys
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Iterator, List, Optional
 
 from universal_task_sync.models import TaskCIR
-from universal_task_sync.serialization import TaskJSONEncoder
+from universal_task_sync.serialization import json_dumps, json_loads
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional, without it arrays are parsed in one go
+    ijson = None
+
+# Field names are fixed per class, so resolve them once instead of per task.
+_FIELDS = tuple(f.name for f in dataclasses.fields(TaskCIR))
 
 
 class JsonPlugin:
     """Strictly handles JSON File <-> CIF translation and IO."""
 
+    @property
     def name(self) -> str:
         return "json"
 
+    def __init__(self):
+        self.project: Optional[str] = None
+        self._path: Optional[Path] = None
+        self._stamp: Optional[tuple] = None
+        self._cached: Optional[List[dict]] = None
+
     def set_filter(self, filter: str):
         self.project = filter
+        self._path = Path(filter)
+        self._stamp = self._cached = None
 
     def authenticate(self):
         return True
         pass
 
     def to_cif(self, raw_data: dict) -> TaskCIR:
-        """Enhanced to_cif that reconstructs Types from strings."""
-        # Convert status string back to Enum
-        if "status" in raw_data and isinstance(raw_data["status"], str):
-            raw_data["status"] = TaskStatus(raw_data["status"])
-
-        # Convert priority string back to Enum
-        if raw_data.get("priority"):
-            raw_data["priority"] = Priority(raw_data["priority"])
-
-        # Convert ISO strings back to datetime
-        for date_field in ["last_modified", "start", "due", "scheduled"]:
-            if raw_data.get(date_field):
-                raw_data[date_field] = datetime.fromisoformat(raw_data[date_field])
-
-        return TaskCIR(**raw_data)
+        """Rebuild a TaskCIR; from_dict restores enums, datetimes and durations from strings."""
+        return TaskCIR.from_dict(raw_data)
 
     def from_cif(self, task: TaskCIR) -> dict:
-        """Translate a TaskCIR object to a dictionary for JSON serialization."""
-        return dataclasses.asdict(task)
+        """
+        Translate a TaskCIR object to a dictionary for JSON serialization.
+        A shallow walk is enough: the result is serialized straight away.
+        """
+        return {n: getattr(task, n) for n in _FIELDS}
 
-    def fetch_raw(self, target: str) -> List[dict]:
+    def fetch_raw(self, target: Optional[str] = None) -> Iterator[dict]:
         """
-        IO: Read from a JSON file.
+        IO: Stream tasks from a JSON or JSON-Lines (.jsonl) file.
         In this plugin, 'self.project' is interpreted as the file path.
+        Records are kept after a full read and reused while the file is unchanged.
         """
-        path = Path(self.project)
-        if not path.exists():
-            return []
-
-        with open(path) as f:
-            data = json.load(f)
-            return data if isinstance(data, list) else [data]
+        if self._path is None:
+            self._path = Path(self.project)
+        try:
+            st = self._path.stat()
+        except FileNotFoundError:
+            return
+
+        stamp = (st.st_mtime_ns, st.st_size)
+        if self._cached is not None and stamp == self._stamp:
+            yield from self._cached
+            return
+
+        records = []
+        for raw in self._read(self._path):
+            records.append(raw)
+            yield raw
+        # Only a fully consumed read is cached
+        self._cached, self._stamp = records, stamp
+
+    @staticmethod
+    def _read(path: Path) -> Iterator[dict]:
+        with open(path, "rb") as f:
+            if path.suffix == ".jsonl":
+                for line in f:
+                    if line.strip():
+                        yield json_loads(line)
+                return
+
+            # Top-level arrays are yielded element by element when ijson is available
+            if ijson is not None and f.peek(1).lstrip()[:1] == b"[":
+                yield from ijson.items(f, "item", use_float=True)
+                return
+
+            data = json_loads(f.read())
+            yield from data if isinstance(data, list) else [data]
 
     def delete_task(self, tool_uid: str, target: str = None) -> bool:
         pass
@@ -63,8 +98,14 @@ class JsonPlugin:
 
     def send_raw(self, raw_data: Any):
         """
-        IO: Write to stdout or a file.
-        By default, we output to stdout to allow piping (e.g., uts -o json > tasks.json).
+        IO: Write one JSON-Lines record to stdout.
+        Output can be piped (e.g., uts -o json > tasks.jsonl) and read back by fetch_raw.
         """
-        # We wrap in a list because uts processes tasks one by one in the loop
-        print(json.dumps(raw_data, cls=TaskJSONEncoder, indent=4))
+        # The encoder already returns bytes, so they go to the binary buffer as-is.
+        out = sys.stdout.buffer
+        out.write(json_dumps(raw_data))
+        out.write(b"\n")
+
+    def flush(self) -> None:
+        """Flush buffered output once the sync has written every task."""
+        sys.stdout.buffer.flush()
@@ -1,17 +1,81 @@
-import json
+import hashlib
 import subprocess
 from datetime import datetime, timedelta
-from typing import List
+from functools import lru_cache
+from typing import Iterable, List
 
 import typer
 from taskw import TaskWarrior
 
 from universal_task_sync.models import Priority, TaskCIR, TaskStatus
+from universal_task_sync.serialization import json_dumps, json_loads
+
+
+# Tasks edited in bulk share timestamps and efforts, so parses are memoized.
+# datetime/timedelta are immutable, which makes the cached values safe to share.
+@lru_cache(maxsize=4096)
+def _parse_tw_date(d_str):
+    if not d_str:
+        return None
+    # Fixed YYYYMMDDTHHMMSSZ layout: slice instead of running strptime
+    return datetime(
+        int(d_str[0:4]), int(d_str[4:6]), int(d_str[6:8]), int(d_str[9:11]), int(d_str[11:13]), int(d_str[13:15])
+    )
+
+
+# Seconds per duration suffix, e.g. '2h' -> 2 * 3600
+_DUR_UNITS = {"m": 60.0, "h": 3600.0, "d": 86400.0, "w": 604800.0}
+
+
+@lru_cache(maxsize=4096)
+def _parse_tw_dur(dur_str):
+    if not dur_str:
+        return None
+    unit = _DUR_UNITS.get(dur_str[-1:])
+    if unit is None:
+        return None
+    try:
+        value = float(dur_str[:-1])
+    except ValueError:
+        return None
+    return timedelta(seconds=value * unit)
+
+
+# Recomputed by Taskwarrior on every export (urgency ages with the task, ids renumber); neither reaches the CIF
+_VOLATILE_FIELDS = frozenset(("id", "urgency"))
+
+
+# Stripped from a fetched task before it is queued for `task import`
+_READ_ONLY_FIELDS = ("id", "mask", "urgency", "modified", "entry", "status")
+
+
+def _format_tw_date(dt):
+    # Same output as strftime("%Y%m%dT%H%M%SZ") without the format interpreter
+    if not dt:
+        return None
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
 
 
 class TaskwarriorPlugin:
     """Strictly handles TW <-> CIF translation and IO."""
 
+    # The enum values are Taskwarrior's own strings, so each enum's value index is the lookup table
+    _STATUS_MAP = TaskStatus._value2member_map_
+    _PRIORITY_MAP = Priority._value2member_map_
+
+    def __init__(self):
+        self.target = None
+        self.filter: dict = {"tags": []}
+        self._extra_tags: frozenset = frozenset()
+        self._pending_updates: List[dict] = []
+        self._tw_inst = None
+
+    def _tw(self) -> TaskWarrior:
+        """Return the shared TaskWarrior client; it loads .taskrc once per plugin."""
+        if self._tw_inst is None:
+            self._tw_inst = TaskWarrior()
+        return self._tw_inst
+
     def set_filter(self, filter):
         self.target = filter
         parts = filter.split()
@@ -25,7 +89,10 @@ class TaskwarriorPlugin:
                 # Split by the first colon found
                 key, value = item.split(":", 1)
                 result[key] = value
-                self.filter = result
+
+        self.filter = result
+        # Tags every outgoing task must carry, merged per task in from_cif
+        self._extra_tags = frozenset(result["tags"])
 
     @property
     def name(self) -> str:
@@ -36,59 +103,41 @@ class TaskwarriorPlugin:
 
     def to_cif(self, raw: dict) -> TaskCIR:
         """Translate TW JSON dict to CIF."""
-        # Status Mapping
-        status_map = {
-            "pending": TaskStatus.PENDING,
-            "completed": TaskStatus.COMPLETED,
-            "deleted": TaskStatus.DELETED,
-            "waiting": TaskStatus.WAITING,
+        return TaskCIR(**self._cif_fields(raw))
+
+    def to_cif_many(self, raws: Iterable[dict]) -> List[TaskCIR]:
+        """Translate a whole export in one pass with the per-task lookups bound once."""
+        cif_fields = self._cif_fields
+        return [TaskCIR(**cif_fields(raw)) for raw in raws]
+
+    def _cif_fields(self, raw: dict) -> dict:
+        """The CIF field values Taskwarrior has a source for."""
+        return {
+            "uuid": raw.get("uuid"),
+            "tool_uid": raw.get("uuid"),
+            "last_modified": _parse_tw_date(raw.get("modified")) or datetime.now(),
+            "description": raw.get("description", ""),
+            "body": "\n".join([a["description"] for a in raw.get("annotations", [])]),
+            "project": raw.get("project"),
+            "status": self._STATUS_MAP.get(raw.get("status"), TaskStatus.PENDING),
+            "priority": self._PRIORITY_MAP.get(raw.get("priority")),
+            "tags": raw.get("tags", []),
+            "start": _parse_tw_date(raw.get("start")),
+            "due": _parse_tw_date(raw.get("due")),
+            "scheduled": _parse_tw_date(raw.get("scheduled")),
+            "effort": _parse_tw_dur(raw.get("effort")),
+            "progress": int(raw.get("percentage", 0)),
+            "depends": raw.get("depends", []),
+            "owner": raw.get("owner"),
         }
 
-        # Date Helper
-        def p_date(d_str):
-            if not d_str:
-                return None
-            return datetime.strptime(d_str, "%Y%m%dT%H%M%SZ")
-
-        # Duration Helper
-        def p_dur(dur_str):
-            if not dur_str:
-                return None
-            # Basic parsing: '2h' -> timedelta
-            try:
-                if "h" in dur_str:
-                    return timedelta(hours=float(dur_str.replace("h", "")))
-                if "d" in dur_str:
-                    return timedelta(days=float(dur_str.replace("d", "")))
-            except:
-                pass
-            return None
-
-        return TaskCIR(
-            uuid=raw.get("uuid"),
-            tool_uid=raw.get("uuid"),
-            last_modified=p_date(raw.get("modified")) or datetime.now(),
-            description=raw.get("description", ""),
-            body="\n".join([a["description"] for a in raw.get("annotations", [])]),
-            project=raw.get("project"),
-            status=status_map.get(raw.get("status"), TaskStatus.PENDING),
-            priority=Priority(raw.get("priority")) if raw.get("priority") in ["H", "M", "L"] else None,
-            tags=raw.get("tags", []),
-            start=p_date(raw.get("start")),
-            due=p_date(raw.get("due")),
-            scheduled=p_date(raw.get("scheduled")),
-            effort=p_dur(raw.get("effort")),
-            progress=int(raw.get("percentage", 0)),
-            depends=raw.get("depends", []),
-            owner=raw.get("owner"),
-        )
+    def raw_hash(self, raw: dict) -> str:
+        """Digest of an exported record, leaving out the fields that change without an edit."""
+        stable = {k: v for k, v in raw.items() if k not in _VOLATILE_FIELDS}
+        return hashlib.blake2b(json_dumps(stable, sort_keys=True), digest_size=16).hexdigest()
 
     def from_cif(self, task: TaskCIR) -> dict:
         """Translate CIF to TW JSON dict."""
-
-        def f_date(dt):
-            return dt.strftime("%Y%m%dT%H%M%SZ") if dt else None
-
         tw_dict = {
             "uuid": task.uuid,
             "description": task.description,
@@ -96,29 +145,28 @@ class TaskwarriorPlugin:
             "status": task.status.value,
             "tags": task.tags,
             "priority": task.priority.value if task.priority else None,
-            "start": f_date(task.start),
-            "due": f_date(task.due),
-            "scheduled": f_date(task.scheduled),
+            "start": _format_tw_date(task.start),
+            "due": _format_tw_date(task.due),
+            "scheduled": _format_tw_date(task.scheduled),
             "depends": task.depends,
         }
 
         # Add annotations for the body if content exists
         if task.body:
-            tw_dict["annotations"] = [{"entry": f_date(datetime.now()), "description": task.body}]
+            tw_dict["annotations"] = [{"entry": _format_tw_date(datetime.now()), "description": task.body}]
 
         # Convert effort timedelta back to string (e.g., '2.0h')
         if task.effort:
             tw_dict["effort"] = f"{task.effort.total_seconds() / 3600}h"
-        if self.filter["project"]:
+        if self.filter.get("project"):
             tw_dict["project"] = self.filter["project"]
-        tw_dict["tags"].extend(self.filter["tags"])
-        if len(tw_dict) > 0:
-            tw_dict["tags"] = list(set(tw_dict["tags"]))
+        # Builds a new list, leaving task.tags untouched
+        tw_dict["tags"] = list(self._extra_tags.union(task.tags))
 
         return {k: v for k, v in tw_dict.items() if v is not None and (not isinstance(v, list) or len(v) > 0)}
 
     def fetch_one(self, tool_uid: str) -> dict:
-        w = TaskWarrior()
+        w = self._tw()
         _, tw_task = w.get_task(uuid=tool_uid)
         return tw_task
 
@@ -129,11 +177,12 @@ class TaskwarriorPlugin:
             cmd.append(self.target)
         cmd.append("export")
 
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(result.stdout)
+        # Keep stdout as bytes; the JSON parser decodes UTF-8 itself
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        return json_loads(result.stdout)
 
     def add_task(self, task: TaskCIR, target: str) -> str:
-        w = TaskWarrior()
+        w = self._tw()
         t = self.from_cif(task)
         tsk = w.task_add(**t)
         return tsk["uuid"]
@@ -143,7 +192,7 @@ class TaskwarriorPlugin:
         In Taskwarrior, we 'complete' tasks rather than hard-deleting them
         to keep the history in the 'Completed' list.
         """
-        w = TaskWarrior()
+        w = self._tw()
         try:
             # Mark the task as done
             w.task_done(uuid=tool_uid)
@@ -158,14 +207,13 @@ class TaskwarriorPlugin:
 
     def update_task(self, tool_uid: str, task: TaskCIR, target: str) -> str:
 
-        w = TaskWarrior()
+        w = self._tw()
         if tool_uid is None:
             return self.add_task(task, target)
 
         # Fetch existing task
         try:
             _, tw_task = w.get_task(uuid=tool_uid)
-            print(f"{tast=} {tw_task=}")
         except Exception:
             typer.secho(f"❌ Taskwarrior task {tool_uid} not found.", fg="red")
             return tool_uid
@@ -176,43 +224,48 @@ class TaskwarriorPlugin:
         # Handle Target -> Project (e.g. project:uts -> uts)
         if target and target.startswith("project:"):
             tw_task["project"] = target.split(":", 1)[1]
-        # Handle status
 
         # Handle body/notes (Taskwarrior uses 'annotations')
         if task.body:
             # Check if this note already exists to avoid duplicates
-            existing_notes = [a["description"] for a in tw_task.get("annotations", [])]
-            if task.body not in existing_notes:
-                w.task_annotate(tool_uid, task.body)
-
-        # 2. CRITICAL: Remove Read-Only Internal Fields
-        # This prevents the "mask", "modified", and "entry" errors
-        protected_fields = [
-            "id",
-            "mask",
-            "urgency",
-            "modified",
-            "entry",
-            "uuid",
-            "status",  # status should be handled via w.task_done() if completed
-        ]
-        for field in protected_fields:
+            annotations = tw_task.setdefault("annotations", [])
+            if task.body not in [a["description"] for a in annotations]:
+                annotations.append({"entry": _format_tw_date(datetime.now()), "description": task.body})
+
+        # 2. Remove read-only internal fields ("mask", "modified" and "entry" errors); status goes
+        # through task_done() below. uuid stays: `task import` matches the existing task by it
+        for field in _READ_ONLY_FIELDS:
             tw_task.pop(field, None)
 
         # 3. Handle Status separately
-        from universal_task_sync.models import TaskStatus
-
         if task.status == TaskStatus.COMPLETED:
             w.task_done(uuid=tool_uid)
         else:
-            # Push updates for pending tasks
-            print(f"at end {tast=} {tw_task=}")
-            w.task_update(tw_task)
+            # Queue pending updates; flush() sends them in a single `task import`
+            self._pending_updates.append(tw_task)
 
         return tool_uid
 
+    def flush(self) -> None:
+        """
+        Import all queued updates at once. update_task() only queues them, so
+        callers must flush before recording any state that assumes they landed.
+        A failed import raises and leaves the updates queued.
+        """
+        pending, self._pending_updates = self._pending_updates, []
+        try:
+            self.send_batch(pending)
+        except Exception:
+            self._pending_updates = pending + self._pending_updates
+            raise
+
+    def send_batch(self, raw_items: List[dict]) -> None:
+        """IO: Import many tasks with one `task import` invocation."""
+        if not raw_items:
+            return
+        # Taskwarrior import accepts a list of JSON objects via stdin
+        subprocess.run(["task", "import"], input=json_dumps(raw_items), check=True)
+
     def send_raw(self, raw_data: dict):
         """IO: Import into Taskwarrior."""
-        # Taskwarrior import accepts a list of JSON objects via stdin
-        input_json = json.dumps([raw_data])
-        subprocess.run(["task", "import"], input=input_json, text=True, check=True)
+        self.send_batch([raw_data])
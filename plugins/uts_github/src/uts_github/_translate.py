@@ -0,0 +1,76 @@
+"""
+Pure GitHub <-> CIF translation, kept free of I/O and plugin state so it can
+be compiled with mypyc (see the opt-in build hook in pyproject.toml).
+"""
+
+import logging
+import sys
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, Dict, List
+
+from universal_task_sync.models import TaskCIR, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+_get_name = itemgetter("name")
+_get_number = itemgetter("number")
+
+
+if sys.version_info >= (3, 11):
+
+    def parse_gh_datetime(value: str) -> datetime:
+        # 3.11+ parses the trailing "Z" natively
+        return datetime.fromisoformat(value)
+
+else:
+
+    def parse_gh_datetime(value: str) -> datetime:
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+
+
+def issue_to_cif(raw: Dict[str, Any]) -> TaskCIR:
+    """Translate a GraphQL issue node to CIF."""
+    tool_uid = f"issue:{raw['number']}"
+    # %-style so the raw dict is only formatted when debug logging is on
+    logger.debug("to_cif %s labels=%s", tool_uid, raw.get("labels"))
+    labels = raw.get("labels") or ()
+    # GraphQL nests labels under "nodes"; REST payloads return a bare list
+    if isinstance(labels, dict):
+        labels = labels.get("nodes") or ()
+    tags: List[str] = list(map(_get_name, labels))
+
+    status = TaskStatus.COMPLETED if raw["state"] == "CLOSED" else TaskStatus.PENDING
+
+    parent = raw.get("parent")
+    depends = [f"issue:{parent['number']}"] if parent else []
+    followers = [f"issue:{n}" for n in map(_get_number, (raw.get("subIssues") or {}).get("nodes") or ())]
+
+    return TaskCIR(
+        uuid="",
+        tool_uid=tool_uid,
+        description=raw["title"],
+        body=raw.get("body") or "",
+        status=status,
+        tags=tags,
+        depends=depends,
+        followers=followers,
+        last_modified=parse_gh_datetime(raw["updatedAt"]),
+        custom_fields={"_github": {"issue_node_id": raw["id"]}},
+    )
+
+
+def cif_to_issue(task: TaskCIR) -> Dict[str, Any]:
+    """Translate CIF to a REST issue payload."""
+    labels = list(task.tags)
+    if task.priority:
+        labels.append(f"priority:{task.priority.value}")
+
+    return {
+        "title": task.description,
+        "body": task.body,
+        "state": "closed" if task.status == TaskStatus.COMPLETED else "open",
+        "labels": labels,
+    }
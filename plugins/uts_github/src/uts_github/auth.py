@@ -1,15 +1,31 @@
 import json
 import os
 from pathlib import Path
+from typing import List, Optional
 
 import typer
 
+from universal_task_sync.serialization import json_loads
+
+# The PAT is read once per process; auth failures and deletion invalidate it.
+_PAT_CACHE: Optional[str] = None
+
+
+def get_env_tokens() -> List[str]:
+    """PATs from GITHUB_TOKENS (comma-separated), used as a pool instead of the stored PAT."""
+    return [t.strip() for t in os.getenv("GITHUB_TOKENS", "").split(",") if t.strip()]
+
 
 def get_config_path() -> Path:
     return Path.home() / ".config" / "universal_task_sync" / "github.json"
 
 
 def get_github_creds(force_prompt: bool = False) -> str:
+    global _PAT_CACHE
+    if _PAT_CACHE and not force_prompt:
+        return _PAT_CACHE
+    _PAT_CACHE = None
+
     config_path = get_config_path()
 
     # If forced or file doesn't exist, prompt user
@@ -24,17 +40,20 @@ def get_github_creds(force_prompt: bool = False) -> str:
         with open(config_path, "w") as f:
             json.dump({"pat": pat}, f)
 
-    with open(config_path) as f:
-        data = json.load(f)
+    with open(config_path, "rb") as f:
+        data = json_loads(f.read())
 
     pat = data.get("pat")
     if not pat:
         raise RuntimeError("GitHub PAT missing from config file")
 
+    _PAT_CACHE = pat
     return pat
 
 
 def delete_github_creds() -> None:
+    global _PAT_CACHE
+    _PAT_CACHE = None
     config_path = get_config_path()
     if config_path.exists():
         os.remove(config_path)
@@ -0,0 +1,88 @@
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from universal_task_sync.db import get_data_dir
+from universal_task_sync.serialization import json_dumps, json_loads
+
+
+def init_cache_db(db_path) -> None:
+    with sqlite3.connect(db_path) as conn:
+        # ETag + last body per REST URL, so unchanged resources come back as free 304s
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS etag_cache (
+                url   TEXT PRIMARY KEY,
+                etag  TEXT NOT NULL,
+                body  TEXT NOT NULL
+            )
+        """)
+        # Issue number -> GraphQL node id; a node id never changes for the life of an issue
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS node_map (
+                repo        TEXT NOT NULL,
+                tool_uid    TEXT NOT NULL,
+                node_id     TEXT NOT NULL,
+                updated_at  TEXT,
+                PRIMARY KEY (repo, tool_uid)
+            )
+        """)
+        conn.commit()
+
+
+class GitHubCache:
+    """
+    On-disk cache for the GitHub plugin, kept next to map.db so it
+    survives across CLI invocations. ETag lookups are served from memory
+    once the table has been read.
+    """
+
+    def __init__(self) -> None:
+        self.db_path = get_data_dir() / "github_cache.db"
+        init_cache_db(self.db_path)
+        self._etag_cache: Optional[Dict[str, Tuple[str, Any]]] = None
+
+    def _etags(self) -> Dict[str, Tuple[str, Any]]:
+        if self._etag_cache is None:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute("SELECT url, etag, body FROM etag_cache").fetchall()
+            self._etag_cache = {url: (etag, body) for url, etag, body in rows}
+        return self._etag_cache
+
+    def get_etag(self, url: str) -> Optional[Tuple[str, Any]]:
+        """Return (etag, parsed body) for a URL, or None if it was never cached."""
+        entry = self._etags().get(url)
+        if entry is None:
+            return None
+        etag, body = entry
+        if isinstance(body, str):
+            # Bodies loaded from disk are parsed lazily, on first use
+            body = json_loads(body)
+            self._etag_cache[url] = (etag, body)
+        return etag, body
+
+    def put_etag(self, url: str, etag: str, body: Any) -> None:
+        self._etags()[url] = (etag, body)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO etag_cache (url, etag, body) VALUES (?, ?, ?)",
+                (url, etag, json_dumps(body).decode()),
+            )
+
+    def get_node_ids(self, repo: str, tool_uids: List[str]) -> Dict[str, str]:
+        """Known node ids for the given tool_uids; misses are simply absent."""
+        if not tool_uids:
+            return {}
+        marks = ",".join("?" * len(tool_uids))
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                f"SELECT tool_uid, node_id FROM node_map WHERE repo = ? AND tool_uid IN ({marks})",
+                (repo, *tool_uids),
+            ).fetchall()
+        return dict(rows)
+
+    def put_node_ids(self, repo: str, rows: Iterable[Tuple[str, str, Optional[str]]]) -> None:
+        """Record (tool_uid, node_id, updated_at) rows in one transaction."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO node_map (repo, tool_uid, node_id, updated_at) VALUES (?, ?, ?, ?)",
+                ((repo, *row) for row in rows),
+            )
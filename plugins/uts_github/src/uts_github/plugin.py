@@ -1,17 +1,137 @@
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import textwrap
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import requests
 import typer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from universal_task_sync.base import BasePlugin
-from universal_task_sync.models import TaskCIR, TaskStatus
+from universal_task_sync.models import TaskCIR
+from universal_task_sync.serialization import json_dumps, json_loads
 
-from .auth import delete_github_creds, get_github_creds
+from ._translate import cif_to_issue, issue_to_cif
+from .auth import delete_github_creds, get_env_tokens, get_github_creds
+from .cache import GitHubCache
+from .ratelimit import TokenPool, retry_delay
 
 logger = logging.getLogger(__name__)
 
+# addSubIssue mutations aliased into one GraphQL request, within the complexity budget
+LINKS_PER_MUTATION = 20
+
+# Retries of a single rate-limited request before the 403/429 is handed back
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Issue aliases per batched GraphQL query, kept well under GitHub's complexity limit
+FETCH_MANY_CHUNK = 50
+
+# Shared by the paged listing and fetch_many so both return the same node shape
+_FRAGMENT_ISSUE = textwrap.dedent("""
+    fragment F on Issue {
+      id number title body state updatedAt
+      labels(first:20){ nodes{ name } }
+      parent { id number }
+      subIssues(first:50){ nodes{ id number } }
+    }
+""").strip()
+
+_Q_FETCH_ISSUES = textwrap.dedent("""
+    query($owner:String!, $repo:String!, $after:String,
+          $states:[IssueState!], $labels:[String!]) {
+      repository(owner:$owner, name:$repo) {
+        issues(first:100, after:$after, states:$states, filterBy:{ labels:$labels }) {
+          pageInfo { hasNextPage endCursor }
+          nodes { ...F }
+        }
+      }
+    }
+""").strip() + "\n" + _FRAGMENT_ISSUE
+
+
+def _graphql_prefix(query: str) -> bytes:
+    """'{"query":...,"variables":' pre-encoded, so each request only serializes its variables."""
+    return json_dumps({"query": query})[:-1] + b',"variables":'
+
+
+_P_FETCH_ISSUES = _graphql_prefix(_Q_FETCH_ISSUES)
+
+
+# Batched documents depend only on how many aliases they carry, so each size is built once
+@lru_cache(maxsize=None)
+def _fetch_many_prefix(count: int) -> bytes:
+    params = ", ".join(f"$n{i}:Int!" for i in range(count))
+    aliases = " ".join(f"i{i}:issue(number:$n{i}){{ ...F }}" for i in range(count))
+    query = f"query($owner:String!, $repo:String!, {params}) {{ repository(owner:$owner, name:$repo) {{ {aliases} }} }}"
+    return _graphql_prefix(query + "\n" + _FRAGMENT_ISSUE)
+
+
+@lru_cache(maxsize=None)
+def _add_sub_issues_prefix(count: int) -> bytes:
+    params = ", ".join(f"$p{i}:ID!, $c{i}:ID!" for i in range(count))
+    body = " ".join(
+        f"m{i}: addSubIssue(input:{{ issueId:$p{i}, subIssueId:$c{i} }}) {{ issue {{ id }} }}" for i in range(count)
+    )
+    return _graphql_prefix(f"mutation({params}) {{ {body} }}")
+
+
+@dataclass(frozen=True)
+class RepoTarget:
+    """
+    A parsed "owner/repo" target; parsing is cached since every write passes
+    the same string. Filter tokens after the repo (see parse_filter) are ignored.
+    """
+
+    owner: str
+    name: str
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def parse(target: str) -> "RepoTarget":
+        owner, sep, name = (target.split(None, 1) or [""])[0].partition("/")
+        if not sep or not owner or not name or "/" in name:
+            raise ValueError(f"GitHub target must look like 'owner/repo', got {target!r}")
+        return RepoTarget(owner, name)
+
+    @property
+    def slug(self) -> str:
+        return f"{self.owner}/{self.name}"
+
+
+_STATES = {"open": ["OPEN"], "closed": ["CLOSED"], "all": ["OPEN", "CLOSED"]}
+
+
+def parse_filter(target: str) -> Dict[str, Any]:
+    """
+    Server-side issue filters from the tokens after "owner/repo":
+      state:open|closed|all   +label
+    Returned as GraphQL variables for the issue listing. Issues filtered out
+    are not fetched at all, so sync treats them like tasks deleted on GitHub:
+    once synced, an issue that is closed (under state:open) or loses the label
+    gets its peer task completed.
+
+    There is no incremental since: filter; every issue it left out would look
+    deleted in the same way.
+    """
+    variables: Dict[str, Any] = {"states": _STATES["all"], "labels": None}
+    labels: List[str] = []
+    for item in target.split()[1:]:
+        if item.startswith("+"):
+            labels.append(item[1:])
+        elif item.startswith("state:"):
+            state = item.split(":", 1)[1].lower()
+            if state not in _STATES:
+                raise ValueError(f"Unknown issue state {state!r}; use one of {', '.join(_STATES)}")
+            variables["states"] = _STATES[state]
+        elif item.startswith("since:"):
+            raise ValueError("since: is not supported: issues it leaves out would be completed on the other side")
+    if labels:
+        variables["labels"] = labels
+    return variables
+
 
 class GitHubPlugin(BasePlugin):
     """
@@ -28,46 +148,141 @@ class GitHubPlugin(BasePlugin):
     def __init__(self):
         self.base_url = "https://api.github.com"
         self.graphql_url = "https://api.github.com/graphql"
-        self.headers: Dict[str, str] = {}
+        self.headers: Dict[str, str] = {"Accept": "application/vnd.github+json"}
         self.target: Optional[str] = None
+        self.repo: Optional[RepoTarget] = None
+        self.issue_filter: Dict[str, Any] = parse_filter("")
         self.project_id: Optional[str] = None
         self.project_fields: Dict[str, str] = {}
 
+        # One pooled session keeps the TCP+TLS connection alive across calls.
+        # With brotli installed requests advertises "br" next to gzip and
+        # urllib3 decodes it transparently.
+        self.session = requests.Session()
+        retries = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "PATCH"],
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=32, max_retries=retries))
+        self.session.headers.update(self.headers)
+        # Filled in by authenticate(); thread-safe, so concurrent callers share it
+        self.token_pool = TokenPool([])
+        self.cache = GitHubCache()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "GitHubPlugin":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     @property
     def name(self) -> str:
         return "github"
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the rate limiter.
+        Primary and secondary rate limits (403/429) are waited out and retried
+        with exponential backoff; any other response is returned as-is.
+        """
+        headers = kwargs.pop("headers", None) or {}
+        if "json" in kwargs:
+            # Encode bodies ourselves so they go through orjson when it's installed
+            kwargs["data"] = json_dumps(kwargs.pop("json"))
+            headers["Content-Type"] = "application/json"
+        backoff = 1.0
+        for _ in range(MAX_RATE_LIMIT_RETRIES):
+            # Each attempt may go out on a different token of the pool
+            token, limiter = self.token_pool.next()
+            limiter.acquire()
+            auth = {"Authorization": f"Bearer {token}"} if token else {}
+            r = self.session.request(method, url, headers={**headers, **auth}, **kwargs)
+            limiter.update(r.headers)
+            if not self._is_rate_limited(r):
+                return r
+            delay = retry_delay(r.headers, backoff)
+            logger.debug("rate limited on %s %s, token cooling down for %.1fs", method, url, delay)
+            limiter.pause(delay)
+            if len(self.token_pool) == 1:
+                backoff = min(backoff * 2, 60.0)
+        return r
+
+    def _graphql(self, prefix: bytes, variables: dict) -> requests.Response:
+        """POST a pre-encoded query prefix (see _graphql_prefix) with this call's variables."""
+        return self._request(
+            "POST",
+            self.graphql_url,
+            data=prefix + json_dumps(variables) + b"}",
+            headers={"Content-Type": "application/json"},
+        )
+
+    def _get_json(self, url: str):
+        """
+        Conditional GET: revalidates against the cached ETag and reuses the
+        cached body on 304, which GitHub does not count against the rate limit.
+        """
+        cached = self.cache.get_etag(url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        r = self._request("GET", url, headers=headers)
+        if r.status_code == 304 and cached:
+            return cached[1]
+        r.raise_for_status()
+        body = json_loads(r.content)
+        etag = r.headers.get("ETag")
+        if etag:
+            self.cache.put_etag(url, etag, body)
+        return body
+
+    @staticmethod
+    def _is_rate_limited(r: requests.Response) -> bool:
+        if r.status_code == 429:
+            return True
+        # A plain 403 is a permissions error; only retry when GitHub says it's a limit
+        return r.status_code == 403 and ("Retry-After" in r.headers or r.headers.get("X-RateLimit-Remaining") == "0")
+
     def set_filter(self, target: str) -> None:
         self.target = target
+        self.repo = RepoTarget.parse(target)
+        self.issue_filter = parse_filter(target)
 
     # -------------------------
     # Auth
     # -------------------------
 
     def authenticate(self) -> bool:
-        token = get_github_creds()
-        self.headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/vnd.github+json",
-        }
-
-        r = requests.get(f"{self.base_url}/user", headers=self.headers)
+        env_tokens = get_env_tokens()
+        if env_tokens:
+            # A pooled token that fails would break a share of all requests, so each one is checked
+            for token in env_tokens:
+                self.token_pool = TokenPool([token])
+                if self._request("GET", f"{self.base_url}/user").status_code != 200:
+                    typer.secho(f"❌ Token ...{token[-4:]} from GITHUB_TOKENS was rejected", fg="red")
+                    return False
+            self.token_pool = TokenPool(env_tokens)
+            return True
+
+        self.token_pool = TokenPool([get_github_creds()])
+        r = self._request("GET", f"{self.base_url}/user")
         if r.status_code == 401:
             delete_github_creds()
-            token = get_github_creds(force_prompt=True)
-            self.headers["Authorization"] = f"Bearer {token}"
-            r = requests.get(f"{self.base_url}/user", headers=self.headers)
+            self.token_pool = TokenPool([get_github_creds(force_prompt=True)])
+            r = self._request("GET", f"{self.base_url}/user")
 
         return r.status_code == 200
 
     def validate_permissions(self) -> None:
         self._require_target()
-        resp = requests.get(f"{self.base_url}/repos/{self.target}", headers=self.headers)
+        resp = self._request("GET", f"{self.base_url}/repos/{self.repo.slug}")
         if resp.status_code != 200:
             typer.secho(f"❌ No access to repository {self.target}", fg="red")
             raise typer.Exit(1)
 
-        perms = resp.json().get("permissions", {})
+        perms = json_loads(resp.content).get("permissions", {})
         if not perms.get("push"):
             typer.secho(f"❌ No write access to {self.target}", fg="red")
             raise typer.Exit(1)
@@ -76,131 +291,145 @@ class GitHubPlugin(BasePlugin):
     # Fetch
     # ------------------------------------------------------------------
 
-    def fetch_raw(self) -> List[dict]:
+    def fetch_raw(self) -> Iterator[dict]:
         self._require_target()
-        return self._fetch_issues_with_hierarchy(self.target)
+        return self._fetch_issues_with_hierarchy(self.repo)
 
-    def _fetch_issues_with_hierarchy(self, repo: str) -> List[dict]:
+    def _fetch_issues_with_hierarchy(self, repo: RepoTarget) -> Iterator[dict]:
         """
-        GraphQL fetch:
+        GraphQL fetch, 100 issues per page until pageInfo says we're done:
         - issues
         - parent / subIssues
+        Nodes are yielded page by page, so only one page is held in memory.
         """
-        query = """
-        query($owner:String!, $repo:String!) {
-          repository(owner:$owner, name:$repo) {
-            issues(first:100, states:[OPEN,CLOSED]) {
-              nodes {
-                id number title body state updatedAt
-                labels(first:20){ nodes{ name } }
-                parent { id number }
-                subIssues(first:50){ nodes{ id number } }
-              }
-            }
-          }
-        }
+        owner, name = repo.owner, repo.name
+        after: Optional[str] = None
+        while True:
+            res = self._graphql(_P_FETCH_ISSUES, {"owner": owner, "repo": name, "after": after, **self.issue_filter})
+            res.raise_for_status()
+            issues = json_loads(res.content)["data"]["repository"]["issues"]
+            yield from issues["nodes"]
+            if not issues["pageInfo"]["hasNextPage"]:
+                return
+            after = issues["pageInfo"]["endCursor"]
+
+    def fetch_many(self, tool_uids: List[str]) -> Dict[str, dict]:
         """
-        owner, name = repo.split("/")
-        res = requests.post(
-            self.graphql_url,
-            headers=self.headers,
-            json={"query": query, "variables": {"owner": owner, "repo": name}},
-        )
-        res.raise_for_status()
-        return res.json()["data"]["repository"]["issues"]["nodes"]
+        Fetch several issues by tool_uid with one aliased GraphQL query per
+        FETCH_MANY_CHUNK issues, instead of one REST call each.
+        Returns GraphQL issue nodes (the fetch_raw shape) keyed by tool_uid;
+        issues that don't exist are left out.
+        """
+        self._require_target()
+        owner, name = self.repo.owner, self.repo.name
+        found: Dict[str, dict] = {}
+        numbers = [int(uid.split(":")[1]) for uid in dict.fromkeys(tool_uids)]
+        for start in range(0, len(numbers), FETCH_MANY_CHUNK):
+            chunk = numbers[start : start + FETCH_MANY_CHUNK]
+            variables = {"owner": owner, "repo": name}
+            for i, number in enumerate(chunk):
+                variables[f"n{i}"] = number
+            res = self._graphql(_fetch_many_prefix(len(chunk)), variables)
+            res.raise_for_status()
+            # Missing issues come back as null plus an entry in "errors"
+            repo = (json_loads(res.content).get("data") or {}).get("repository") or {}
+            for node in repo.values():
+                if node:
+                    found[f"issue:{node['number']}"] = node
+        return found
 
     # -------------------------
     # Translation
     # -------------------------
 
     def to_cif(self, raw: dict) -> TaskCIR:
-        tool_uid = f"issue:{raw['number']}"
-        logger.debug(f"{raw=} {raw['number']=} {raw['labels']=}")
-        if len(raw["labels"]) > 0:
-            tags = [l["name"] for l in raw["labels"]["nodes"]]
-        else:
-            tags = []
-
-        status = TaskStatus.COMPLETED if raw["state"] == "CLOSED" else TaskStatus.PENDING
-
-        depends = [f"issue:{raw['parent']['number']}"] if raw.get("parent") else []
-        followers = [f"issue:{i['number']}" for i in raw.get("subIssues", {}).get("nodes", [])]
-
-        return TaskCIR(
-            uuid="",
-            tool_uid=tool_uid,
-            description=raw["title"],
-            body=raw.get("body") or "",
-            status=status,
-            tags=tags,
-            depends=depends,
-            followers=followers,
-            last_modified=datetime.fromisoformat(raw["updatedAt"].replace("Z", "+00:00")),
-            custom_fields={"_github": {"issue_node_id": raw["id"]}},
-        )
+        return self.to_cif_many((raw,))[0]
+
+    def to_cif_many(self, raws: Iterable[dict]) -> List[TaskCIR]:
+        """Translate a batch; the issues' node ids are recorded in one write."""
+        tasks: List[TaskCIR] = []
+        node_ids = []
+        for raw in raws:
+            task = issue_to_cif(raw)
+            tasks.append(task)
+            node_ids.append((task.tool_uid, raw["id"], raw["updatedAt"]))
+        if node_ids and self.repo:
+            self.cache.put_node_ids(self.repo.slug, node_ids)
+        return tasks
 
     def from_cif(self, task: TaskCIR) -> dict:
-        data = {
-            "title": task.description,
-            "body": task.body,
-            "state": "closed" if task.status == TaskStatus.COMPLETED else "open",
-            "labels": task.tags,
-        }
-
-        if task.priority:
-            data["labels"].append(f"priority:{task.priority.value}")
-
-        return data
+        return cif_to_issue(task)
 
     # -------------------------
     # Write Issue
     # -------------------------
 
     def update_task(self, tool_uid: str, task: TaskCIR, target: str) -> str:
-        number = tool_uid.split(":")[1]
-        url = f"{self.base_url}/repos/{target}/issues/{number}"
-        r = requests.patch(url, headers=self.headers, json=self.from_cif(task))
+        url = self._issue_url(tool_uid, RepoTarget.parse(target))
+        r = self._request("PATCH", url, json=self.from_cif(task))
         r.raise_for_status()
         return tool_uid
 
     def send_raw(self, raw_item: dict, target: str) -> str:
-        url = f"{self.base_url}/repos/{target}/issues"
-        r = requests.post(url, headers=self.headers, json=raw_item)
+        url = f"{self.base_url}/repos/{RepoTarget.parse(target).slug}/issues"
+        r = self._request("POST", url, json=raw_item)
         r.raise_for_status()
-        return f"issue:{r.json()['number']}"
+        return f"issue:{json_loads(r.content)['number']}"
 
     # -------------------------
     # Dependencies (Sub-Issues)
     # -------------------------
 
     def update_relationships(self, tool_uid: str, task: TaskCIR, mgr):
-        issue_node_id = task.custom_fields["_github"]["issue_node_id"]
-
-        for dep in task.depends:
-            parent_node = self._resolve_node_id(dep, mgr)
-            self._set_parent(parent_node, issue_node_id)
-
-    def _set_parent(self, parent_id: str, child_id: str):
-        mutation = """
-        mutation($parent:ID!, $child:ID!) {
-          addSubIssue(input:{ issueId:$parent, subIssueId:$child }) {
-            issue { id }
-          }
-        }
-        """
-        requests.post(
-            self.graphql_url,
-            headers=self.headers,
-            json={"query": mutation, "variables": {"parent": parent_id, "child": child_id}},
-        )
+        # The issue and all of its parents are resolved in one batched lookup
+        node_ids = self._resolve_node_ids([tool_uid, *task.depends], mgr)
+        issue_node_id = node_ids[0]
+        if issue_node_id is None:
+            logger.debug("%s not found on GitHub; skipping its links", tool_uid)
+            return
+        parent_nodes = [n for n in node_ids[1:] if n]
+
+        self._set_parents([(parent_node, issue_node_id) for parent_node in parent_nodes])
+
+    def _set_parents(self, links: List[Tuple[str, str]]) -> None:
+        """Send (parent, child) sub-issue links as aliased mutations, LINKS_PER_MUTATION per request."""
+        for start in range(0, len(links), LINKS_PER_MUTATION):
+            chunk = links[start : start + LINKS_PER_MUTATION]
+            variables = {}
+            for i, (parent_id, child_id) in enumerate(chunk):
+                variables[f"p{i}"] = parent_id
+                variables[f"c{i}"] = child_id
+            res = self._graphql(_add_sub_issues_prefix(len(chunk)), variables)
+            # One failed link (e.g. already linked) doesn't abort the others; report it and move on
+            payload = json_loads(res.content) if res.content else {}
+            data = payload.get("data") or {}
+            for i, (parent_id, child_id) in enumerate(chunk):
+                if not data.get(f"m{i}"):
+                    logger.debug("addSubIssue %s <- %s failed: %s", parent_id, child_id, payload.get("errors"))
 
     # -------------------------
     # Helpers
     # -------------------------
 
-    def _resolve_node_id(self, tool_uid: str, mgr) -> str:
-        # Fetch from DB snapshot or refetch
-        raise NotImplementedError("node lookup cache omitted for brevity")
+    def _resolve_node_ids(self, ids: List[str], mgr) -> List[Optional[str]]:
+        """
+        Map tool_uids or internal uuids to GraphQL node ids, in order.
+        Internal uuids are translated through the mapping DB first, then the
+        node_map cache is consulted; only misses go to the API.
+        """
+        self._require_target()
+        tool_uids = [i if i.startswith("issue:") else mgr.get_external_id(self.name, i) for i in ids]
+        wanted = [uid for uid in tool_uids if uid]
+        known = self.cache.get_node_ids(self.repo.slug, wanted)
+        missing = [uid for uid in wanted if uid not in known]
+        if missing:
+            fetched = [(uid, node["id"], node["updatedAt"]) for uid, node in self.fetch_many(missing).items()]
+            self.cache.put_node_ids(self.repo.slug, fetched)
+            known.update((uid, node_id) for uid, node_id, _ in fetched)
+        return [known.get(uid) for uid in tool_uids]
+
+    def _resolve_node_id(self, tool_uid: str, mgr) -> Optional[str]:
+        return self._resolve_node_ids([tool_uid], mgr)[0]
 
     @property
     def config_defaults(self) -> dict:
@@ -212,21 +441,17 @@ class GitHubPlugin(BasePlugin):
         Uses the bound target (repo).
         """
         self._require_target()
-        number = tool_uid.split(":")[1]
-        url = f"{self.base_url}/repos/{self.target}/issues/{number}"
-        r = requests.get(url, headers=self.headers)
-        r.raise_for_status()
-        return r.json()
+        url = self._issue_url(tool_uid)
+        return self._get_json(url)
 
     def patch_raw(self, tool_id: str, raw_item: dict) -> bool:
         """
         Patch an existing issue.
         """
         self._require_target()
-        number = tool_id.split(":")[1]
-        url = f"{self.base_url}/repos/{self.target}/issues/{number}"
+        url = self._issue_url(tool_id)
 
-        r = requests.patch(url, headers=self.headers, json=raw_item)
+        r = self._request("PATCH", url, json=raw_item)
         r.raise_for_status()
         return True
 
@@ -236,12 +461,11 @@ class GitHubPlugin(BasePlugin):
         We treat delete as close.
         """
         self._require_target()
-        number = tool_uid.split(":")[1]
-        url = f"{self.base_url}/repos/{self.target}/issues/{number}"
+        url = self._issue_url(tool_uid)
 
-        r = requests.patch(
+        r = self._request(
+            "PATCH",
             url,
-            headers=self.headers,
             json={"state": "closed"},
         )
         r.raise_for_status()
@@ -254,8 +478,15 @@ class GitHubPlugin(BasePlugin):
             "dependencies": "native",
             "projects": "v2",
             "custom_fields": "project-scoped",
+            # One pooled session and a thread-safe TokenPool: update_task may run from many threads
+            "concurrent_writes": True,
         }
 
+    def _issue_url(self, tool_uid: str, repo: Optional[RepoTarget] = None) -> str:
+        number = tool_uid.split(":")[1]
+        repo = repo or self.repo
+        return f"{self.base_url}/repos/{repo.slug}/issues/{number}"
+
     def _require_target(self):
         if not self.target:
             raise RuntimeError("Plugin target not set via set_filter()")
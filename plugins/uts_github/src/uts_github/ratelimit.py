@@ -0,0 +1,113 @@
+import itertools
+import threading
+import time
+from typing import Iterable, Mapping, Optional, Tuple
+
+
+class RateLimiter:
+    """
+    Leaky-bucket limiter kept in step with GitHub's X-RateLimit-* headers.
+
+    Tokens drip back at `limit / period` per second. Every response resyncs
+    the bucket with the server's remaining count (for GraphQL that count is
+    in points, so query cost is accounted for). When the budget runs out, or
+    GitHub sends Retry-After, acquire() blocks until the window reopens.
+    """
+
+    def __init__(self, limit: int = 5000, period: float = 3600.0):
+        self._lock = threading.Lock()
+        self.limit = limit
+        self.period = period
+        self.tokens = float(limit)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0  # monotonic deadline set by pause()/exhaustion
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._blocked_until:
+                    self.tokens = min(self.limit, self.tokens + (now - self._last) * self.limit / self.period)
+                    self._last = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) * self.period / self.limit
+                else:
+                    wait = self._blocked_until - now
+            time.sleep(wait)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Resync the bucket from a response's rate-limit headers."""
+        limit = headers.get("X-RateLimit-Limit")
+        remaining = headers.get("X-RateLimit-Remaining")
+        if limit is None or remaining is None:
+            return
+        with self._lock:
+            self.limit = max(int(limit), 1)
+            self.tokens = float(remaining)
+            self._last = time.monotonic()
+            if self.tokens < 1:
+                reset = _seconds_until_reset(headers)
+                if reset is not None:
+                    self._blocked_until = max(self._blocked_until, self._last + reset)
+
+    def pause(self, seconds: float) -> None:
+        """Block every caller for `seconds` (e.g. from Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def is_paused(self) -> bool:
+        with self._lock:
+            return time.monotonic() < self._blocked_until
+
+    def resume_at(self) -> float:
+        with self._lock:
+            return self._blocked_until
+
+
+class TokenPool:
+    """
+    Round-robins requests over several PATs, each with its own RateLimiter,
+    so the primary limit scales with the number of tokens. Tokens that are
+    cooling down after a rate-limit response are skipped until they reopen.
+    """
+
+    def __init__(self, tokens: Iterable[Optional[str]]):
+        self._limiters = {token: RateLimiter() for token in dict.fromkeys(tokens)} or {None: RateLimiter()}
+        self._cycle = itertools.cycle(list(self._limiters))
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._limiters)
+
+    def next(self) -> Tuple[Optional[str], RateLimiter]:
+        """The next usable token and its limiter."""
+        with self._lock:
+            for _ in range(len(self._limiters)):
+                token = next(self._cycle)
+                if not self._limiters[token].is_paused():
+                    return token, self._limiters[token]
+            # Every token is cooling down; queue on the one that reopens first
+            token = min(self._limiters, key=lambda t: self._limiters[t].resume_at())
+            return token, self._limiters[token]
+
+
+def _seconds_until_reset(headers: Mapping[str, str]) -> Optional[float]:
+    reset = headers.get("X-RateLimit-Reset")
+    if reset is None:
+        return None
+    return max(float(reset) - time.time(), 0.0)
+
+
+def retry_delay(headers: Mapping[str, str], fallback: float) -> float:
+    """How long GitHub asks us to wait before retrying a rate-limited request."""
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        return float(retry_after)
+    if headers.get("X-RateLimit-Remaining") == "0":
+        reset = _seconds_until_reset(headers)
+        if reset is not None:
+            return reset
+    return fallback
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, List
+from typing import Any, Iterable
 
 from .models import TaskCIR
 
@@ -40,8 +40,8 @@ class BasePlugin(ABC):
         pass
 
     @abstractmethod
-    def fetch_raw(self, target: str) -> List[Any]:
-        """Fetch all raw data from the API."""
+    def fetch_raw(self, target: str) -> Iterable[Any]:
+        """Fetch all raw data from the API; may be a lazy iterator."""
         pass
 
     @abstractmethod
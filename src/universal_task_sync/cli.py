@@ -1,11 +1,25 @@
+import hashlib
+import logging
 import os
 import subprocess
-import tempfile
-from typing import Optional
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import typer
 
+try:
+    import pygit2
+except ImportError:  # pragma: no cover - optional speedup, the git CLI is the fallback
+    pygit2 = None  # type: ignore[assignment]
+
+from .config import get_config, get_full_manifest, load_user_config, save_to_config_file
 from .db import MappingManager
+from .fetch import fetch_tasks, links_outside, snapshot_fingerprint
 from .loader import get_plugin  # Assuming your entry-point loader logic is here
 from .models import TaskCIR
 from .reconciler import reconcile_app
@@ -13,14 +27,20 @@ from .reconciler import reconcile_app
 app = typer.Typer(help="Universal Task Sync: Bridge your task managers.")
 app.add_typer(reconcile_app, name="reconcile")
 
+log = logging.getLogger(__name__)
 
-import logging
 
-logging.basicConfig(
-    filename="/tmp/uts.log",
-    level=logging.DEBUG,
-    format="%(module)s %(funcName)s %(lineno)d %(levelname)s:: %(message)s",
-)
+@app.callback()
+def _configure_logging() -> None:
+    """
+    Logging is set up when a command runs rather than on import.
+    UTS_LOG_FILE and UTS_LOG_LEVEL override the target file and the level.
+    """
+    logging.basicConfig(
+        filename=os.getenv("UTS_LOG_FILE", "/tmp/uts.log"),
+        level=os.getenv("UTS_LOG_LEVEL", "DEBUG").upper(),
+        format="%(module)s %(funcName)s %(lineno)d %(levelname)s:: %(message)s",
+    )
 
 
 @app.command()
@@ -29,6 +49,9 @@ def sync(
     b_plugin: str = typer.Option(..., "--b_plugin", "-b"),
     a_filter: str = typer.Option(..., "--a_filter", help="a filter"),
     b_filter: Optional[str] = typer.Option(None, "--b_filter", help="b filter"),
+    force_mergetool: bool = typer.Option(
+        False, "--force-mergetool", help="Open kdiff3 for every conflict, even ones that merge automatically"
+    ),
 ) -> None:
     """Sync tasks with persistent mapping, recursive discovery, and hybrid link logic."""
     mgr = MappingManager()
@@ -50,32 +73,56 @@ def sync(
 
     # 4. Permission Guard (Plugin Specific)
     # Check if the token has the right scopes for the resolved b_filter
-    if hasattr(b, "validate_permissions"):
-        b.validate_permissions()
-    if hasattr(a, "validate_permissions"):
-        a.validate_permissions()
-    if not typer.confirm(f"Sync {a_plugin} ({a_filter}) <-> {b_plugin} ({b_filter})?", default=True):
-        raise typer.Abort()
-
-    # 1. FETCH & DISCOVER (Recursive Discovery Phase)
-    # Builds the graph and ensures everything has an Internal UUID
-    tasks_a = {a.to_cif(r).tool_uid: a.to_cif(r) for r in a.fetch_raw()}
-    tasks_b = {b.to_cif(r).tool_uid: b.to_cif(r) for r in b.fetch_raw()}
-    logging.debug(f"{tasks_a=}\n{tasks_b=}")
-
-    for t in list(tasks_a.values()):
-        t.uuid = mgr.ensure_mapping(a_plugin, t.tool_uid)
-        t.depends = translate_and_discover(a, tasks_a, t.depends, mgr)
-        t.followers = translate_and_discover(a, tasks_a, t.followers, mgr)
-
-    for t in list(tasks_b.values()):
-        t.uuid = mgr.ensure_mapping(b_plugin, t.tool_uid)
-        t.depends = translate_and_discover(b, tasks_b, t.depends, mgr)
-        t.followers = translate_and_discover(b, tasks_b, t.followers, mgr)
+    # The two sides talk to unrelated backends, so their round-trips overlap
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        checks = [pool.submit(p.validate_permissions) for p in (b, a) if hasattr(p, "validate_permissions")]
+        for check in checks:
+            check.result()
+
+        # Asked before fetching: a running fetch can't be cancelled, so declining would still wait for it
+        if not typer.confirm(f"Sync {a_plugin} ({a_filter}) <-> {b_plugin} ({b_filter})?", default=True):
+            raise typer.Abort()
+
+        # 1. FETCH & DISCOVER (Recursive Discovery Phase)
+        fetch_a = pool.submit(fetch_tasks, a)
+        fetch_b = pool.submit(fetch_tasks, b)
+
+        # Builds the graph and ensures everything has an Internal UUID
+        (tasks_a, raws_a), (tasks_b, raws_b) = fetch_a.result(), fetch_b.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    # Both task dicts are repr'd in full, so only when the line is actually written
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("tasks_a=%r\ntasks_b=%r", tasks_a, tasks_b)
+
+    # Nothing changed on either side since the last complete sync of this pair: nothing to do.
+    # The fingerprint only covers the two fetches, so tasks linked from outside them rule it out
+    cursor = None if links_outside(tasks_a) or links_outside(tasks_b) else snapshot_fingerprint(raws_a, raws_b)
+    if cursor is not None and cursor == mgr.get_cursor(a_plugin, a_filter, b_plugin, b_filter):
+        typer.secho("✅ No changes on either side since the last sync.", fg="green")
+        return
+
+    # Referenced tasks missing from both the fetch and the DB are fetched concurrently up front
+    workers = int(get_config().get("sync_workers", 10))
+    # Fetched tasks are mapped in bulk, then every known link per side is read once;
+    # discovery below resolves ids from these maps
+    uuids_a, uuids_b = mgr.ensure_mappings(a_plugin, tasks_a), mgr.ensure_mappings(b_plugin, tasks_b)
+    known_a, known_b = mgr.load_id_map(a.name), mgr.load_id_map(b.name)
+    for t in tasks_a.values():
+        t.uuid = uuids_a[t.tool_uid]
+    for t in tasks_b.values():
+        t.uuid = uuids_b[t.tool_uid]
+
+    # No content hash is taken before this point: depends/followers are mergeable and are
+    # rewritten to internal uuids here, which would invalidate it
+    all_uuids = resolve_links(a, tasks_a, mgr, workers, known_a)
+    all_uuids.update(resolve_links(b, tasks_b, mgr, workers, known_b))
 
     # 2. HYBRID SYNC PASS (Content + Available Links)
-    all_uuids = set(t.uuid for t in tasks_a.values()) | set(t.uuid for t in tasks_b.values())
     pending_links = []  # Track (plugin, tool_uid, task_cif) for Pass 2
+    conflicts = []  # (base, t_a, t_b, eid_a, eid_b) for the batched 3-way merge
+    pushes = []  # (plugin, eid, task, filter, uid, source, needs_second_pass) for push_updates
 
     mapped_count = len(all_uuids)
     if mapped_count > 0 and (len(tasks_a) == 0 or len(tasks_b) == 0):
@@ -85,11 +132,20 @@ def sync(
             abort=True,
         )
 
+    # Links (every one of both services, in one query) and base states, loaded up front
+    ext_by_uid = mgr.reverse_map((a_plugin, b_plugin))
+    state_by_uid = mgr.load_states(all_uuids)
+    ext_a, ext_b = ext_by_uid[a_plugin], ext_by_uid[b_plugin]
+    # Mapping, status and sync/side state rows are committed together once the writes are done
+    mgr.begin_batch()
+    # Bound once: these run per task (or per dependency) in the loop below
+    update_state, update_sides = mgr.update_sync_state, mgr.update_side_hashes
+
     for uid in all_uuids:
-        eid_a = mgr.get_external_id(a_plugin, uid)
-        eid_b = mgr.get_external_id(b_plugin, uid)
+        eid_a = ext_a.get(uid)
+        eid_b = ext_b.get(uid)
         t_a, t_b = tasks_a.get(eid_a), tasks_b.get(eid_b)
-        last_state = mgr.get_sync_state(uid)
+        last_state = state_by_uid.get(uid)
 
         # A. Handle Completion (Tombstoning)
         if last_state and not (t_a and t_b):
@@ -103,63 +159,158 @@ def sync(
 
         # B. RETAINED: Conflict & Modification Detection
         source, target_plugin, target_eid, target_filter = None, None, None, None
+        target_task = None
+        common_hash = last_state["hash"] if last_state else None
 
         if t_a and not eid_b:  # New on A -> B
             source, target_plugin, target_eid, target_filter = t_a, b, None, b_filter
         elif t_b and not eid_a:  # New on B -> A
             source, target_plugin, target_eid, target_filter = t_b, a, None, a_filter
         elif t_a and t_b:  # Conflict Check
-            dirty_a = t_a.get_content_hash() != (last_state["hash"] if last_state else None)
-            dirty_b = t_b.get_content_hash() != (last_state["hash"] if last_state else None)
+            # Each side is judged against its own post-sync hash, falling back to the merge base
+            sides = last_state["sides"] if last_state and a_plugin != b_plugin else {}
+            raw_a, raw_b = raws_a.get(eid_a), raws_b.get(eid_b)
+            if sides:
+                # A raw record that is byte-for-byte what we saw last time needs no re-hashing
+                if raw_a and raw_a == last_state["raws"].get(a_plugin) and a_plugin in sides:
+                    t_a.assume_content_hash(sides[a_plugin])
+                if raw_b and raw_b == last_state["raws"].get(b_plugin) and b_plugin in sides:
+                    t_b.assume_content_hash(sides[b_plugin])
+            h_a, h_b = t_a.get_content_hash(), t_b.get_content_hash()
+            dirty_a = h_a != sides.get(a_plugin, common_hash)
+            dirty_b = h_b != sides.get(b_plugin, common_hash)
 
             if dirty_a and dirty_b:
-                # RETAINED: Git-based 3-way merge
-                base_task = TaskCIR.from_dict(last_state["data"]) if last_state else None
-                mergedata = resolve_conflict_via_git(base_task, t_a, t_b)
-                source = t_a.copy()
-                source.update_from(mergedata)
-                if source.get_content_hash() != t_a.get_content_hash():
-                    a.update_task(eid_a, source, a_filter)
-                source = t_b.copy()
-                source.update_from(mergedata)
-                if source.get_content_hash() != t_b.get_content_hash():
-                    b.update_task(eid_b, source, b_filter)
-                mgr.update_sync_state(source)
-                # After a merge, we usually want to ensure links are full
-                pending_links.append((a, eid_a, source))
-                pending_links.append((b, eid_b, source))
+                # RETAINED: Git-based 3-way merge, batched after the loop
+                base_task = None
+                if last_state:
+                    base_task = TaskCIR.from_dict(last_state["data"])
+                    base_task.assume_content_hash(common_hash)
+                conflicts.append((base_task, t_a, t_b, eid_a, eid_b))
                 continue
             elif dirty_a:
                 source, target_plugin, target_eid, target_filter = t_a, b, eid_b, b_filter
+                target_task = t_b
             elif dirty_b:
                 source, target_plugin, target_eid, target_filter = t_b, a, eid_a, a_filter
+                target_task = t_a
             else:
+                seen_raws = (last_state["raws"].get(a_plugin), last_state["raws"].get(b_plugin))
+                if a_plugin != b_plugin and (raw_a, raw_b) != seen_raws:
+                    # Clean, but remember the raw fingerprints so the next sync can skip hashing
+                    update_sides(
+                        uid,
+                        {a_plugin: h_a, b_plugin: h_b},
+                        {a_plugin: raw_a, b_plugin: raw_b},
+                    )
                 continue  # Clean
 
         if source:
-            logging.debug(f"{source=} {target_plugin=} {target_eid=} {target_filter=}")
+            log.debug(
+                "source=%r target_plugin=%r target_eid=%r target_filter=%r",
+                source,
+                target_plugin,
+                target_eid,
+                target_filter,
+            )
             available_remote_ids = []
             needs_second_pass = False
+            target_ext = ext_b if target_plugin is b else ext_a
             for dep_uid in source.depends:
-                remote_id = mgr.get_external_id(target_plugin.name, dep_uid)
+                remote_id = target_ext.get(dep_uid)
                 if remote_id:
                     available_remote_ids.append(remote_id)
                 else:
                     needs_second_pass = True
 
             # Temp task for Pass 1 (links only if they exist on target)
-            pass1_task = source.copy()
-            pass1_task.depends = available_remote_ids
-
-            new_eid = target_plugin.update_task(target_eid, pass1_task, target_filter)
-
-            if not target_eid:
-                mgr.create_mapping(target_plugin.name, new_eid, uid)
-                target_eid = new_eid
-
-            mgr.update_sync_state(source)
-            if needs_second_pass:
-                pending_links.append((target_plugin, target_eid, source))
+            pass1_task = source.with_updates({"depends": available_remote_ids})
+
+            # The target may already match (e.g. the same edit made on both sides): skip the write
+            source_hash = source.get_content_hash()
+            if target_task is not None and target_task.get_content_hash() == source_hash:
+                target_hash = source_hash
+                if needs_second_pass:
+                    pending_links.append((target_plugin, target_eid, source))
+            else:
+                # Unknown until the target is read back next sync
+                target_hash = None
+                pushes.append((target_plugin, target_eid, pass1_task, target_filter, uid, source, needs_second_pass))
+
+            # The merge base only moves when the content does
+            if source_hash != common_hash:
+                update_state(source)
+            source_plugin = a if target_plugin is b else b
+            if a_plugin != b_plugin:
+                source_raws, target_raws = (raws_a, raws_b) if source_plugin is a else (raws_b, raws_a)
+                update_sides(
+                    uid,
+                    {source_plugin.name: source_hash, target_plugin.name: target_hash},
+                    {
+                        source_plugin.name: source_raws.get(source.tool_uid),
+                        target_plugin.name: target_raws.get(target_eid),
+                    },
+                )
+
+    # Writes go out once the scan is done, so plugins that allow it can take them concurrently
+    new_eids, push_error = push_updates(pushes, workers)
+    created = []  # (service, new eid, uid) of tasks the pushes created
+    for push, new_eid in zip(pushes, new_eids):
+        if new_eid is None:  # Failed, or never sent after an earlier failure
+            continue
+        target_plugin, target_eid, _, _, uid, source, needs_second_pass = push
+        if not target_eid:
+            created.append((target_plugin.name, new_eid, uid))
+            target_eid = new_eid
+        if needs_second_pass:
+            pending_links.append((target_plugin, target_eid, source))
+    # Not queued with the batch: these tasks exist remotely whether or not the rest of the sync gets through
+    mgr.commit_mappings(created)
+    # Raised only now: tasks the other pushes created exist remotely and must keep their mappings
+    if push_error is not None:
+        raise push_error
+
+    # Tasks changed on both sides are merged together in one scratch repo
+    if conflicts:
+        merged = resolve_conflicts_batch(
+            [(base_task, t_a, t_b) for base_task, t_a, t_b, _, _ in conflicts], force_mergetool
+        )
+        for (base_task, t_a, t_b, eid_a, eid_b), mergedata in zip(conflicts, merged):
+            # Both sides end up with the same mergeable content, so one merged copy
+            # gives the hash for both; B only gets its own copy (for its system fields) when it is written
+            merged_task = t_a.with_updates(mergedata)
+            merged_hash = merged_task.get_content_hash()
+            # Each side's hash as fetched, taken once for both the write check and side_state
+            h_a, h_b = t_a.get_content_hash(), t_b.get_content_hash()
+            wrote_a = merged_hash != h_a
+            if wrote_a:
+                a.update_task(eid_a, merged_task, a_filter)
+            wrote_b = merged_hash != h_b
+            if wrote_b:
+                b.update_task(eid_b, t_b.with_updates(mergedata), b_filter)
+            if base_task is None or merged_hash != base_task.get_content_hash():
+                update_state(merged_task)
+            if a_plugin != b_plugin:
+                # Sides that were rewritten are re-learned on the next read
+                update_sides(
+                    merged_task.uuid,
+                    {
+                        a_plugin: None if wrote_a else h_a,
+                        b_plugin: None if wrote_b else h_b,
+                    },
+                    {a_plugin: raws_a.get(eid_a), b_plugin: raws_b.get(eid_b)},
+                )
+            # After a merge, we usually want to ensure links are full
+            pending_links.append((a, eid_a, merged_task))
+            pending_links.append((b, eid_b, merged_task))
+
+    # Plugins that queue writes push them out before any state is committed: if a flush
+    # fails it raises past flush_batch, the merge base stays put and the next sync retries
+    for plugin in (a, b):
+        if hasattr(plugin, "flush"):
+            plugin.flush()
+
+    mgr.flush_batch()
 
     # 3. PASS 2: Supplemental Links
     if pending_links:
@@ -167,49 +318,245 @@ def sync(
         for plugin, tool_uid, task in pending_links:
             plugin.update_relationships(tool_uid, task, mgr)
 
+    if cursor is not None:
+        mgr.store_cursor(a_plugin, a_filter, b_plugin, b_filter, cursor)
+
+
+def get_cache_dir() -> Path:
+    """Resolve the XDG cache directory for throwaway working state."""
+    xdg_cache = os.getenv("XDG_CACHE_HOME")
+    base = Path(xdg_cache) if xdg_cache else Path.home() / ".cache"
+    cache_dir = base / "universal_task_sync"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+@contextmanager
+def exclusive_lock(path: Path) -> Iterator[None]:
+    """Holds an exclusive lock on `path` (created if needed), waiting for other processes to let go."""
+    with open(path, "w") as lock:
+        # Imported here: each module exists on one platform only
+        if sys.platform == "win32":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+                except OSError:
+                    # LK_LOCK gives up after ~10 one-second attempts; keep waiting like flock does
+                    log.debug("still waiting for %s", path)
+                else:
+                    break
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+
+@contextmanager
+def scratch_repo() -> Iterator[str]:
+    """
+    Yields the persistent merge repo, initialised on first use. Instead of a
+    fresh `git init` per run, the index and working files are cleared here.
+    A lock keeps concurrent syncs from sharing it at the same time.
+    """
+    repo = get_cache_dir() / "merge-scratch"
+    repo.mkdir(exist_ok=True)
+    with exclusive_lock(repo.parent / "merge-scratch.lock"):
+        if not (repo / ".git").is_dir():
+            if pygit2 is not None:
+                pygit2.init_repository(str(repo))
+            else:
+                subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+        # Leftovers from the previous run: an empty index is the same as no index file
+        (repo / ".git" / "index").unlink(missing_ok=True)
+        for entry in repo.iterdir():
+            if entry.name != ".git":
+                entry.unlink()
+        yield str(repo)
 
-def resolve_conflict_via_git(base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR) -> dict:
-    with tempfile.TemporaryDirectory() as tmpdir:
-        subprocess.run(["git", "init", "-q"], cwd=tmpdir)
-        filename = "TASK.json"
-        full_merged_path = os.path.join(tmpdir, filename)
-
-        def get_git_hash(task_obj: TaskCIR | None) -> str:
-            # IMPORTANT: Use the encoder to ensure Enums don't crash the hasher
-            content = task_obj.to_json(only_mergeable=True) if task_obj else "{}"
-            res = subprocess.run(
-                ["git", "hash-object", "-w", "--stdin"], input=content, text=True, capture_output=True, cwd=tmpdir
-            )
-            return res.stdout.strip()
-
-        # Generate the three stages
-        h_base = get_git_hash(base_task)
-        h_p1 = get_git_hash(p1_task)
-        h_p2 = get_git_hash(p2_task)
-
-        # Update index with the 3 stages
-        index_info = f"100644 {h_base} 1\t{filename}\n100644 {h_p1} 2\t{filename}\n100644 {h_p2} 3\t{filename}\n"
-        subprocess.run(["git", "update-index", "--index-info"], input=index_info, cwd=tmpdir, text=True)
-
-        # Write the 'Current' version to disk so kdiff3 has a file to edit
-        with open(full_merged_path, "w") as f:
-            f.write(p1_task.to_json(only_mergeable=True))
-
-        # DEBUG: Print hashes to see if they are all identical
-        print(f"DEBUG: B:{h_base} P1:{h_p1} P2:{h_p2}")
 
-        # The config flags here prevent the 'mv' error even if kdiff3 fails
-        cmd = ["git", "-c", "mergetool.keepBackup=false", "mergetool", "--tool=kdiff3", "--no-prompt", filename]
+def resolve_conflict_via_git(base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR) -> dict:
+    return resolve_conflicts_batch([(base_task, p1_task, p2_task)])[0]
+
+
+def resolve_conflicts_batch(
+    conflicts: List[Tuple[Optional[TaskCIR], TaskCIR, TaskCIR]], force_mergetool: bool = False
+) -> List[dict]:
+    """
+    3-way merges every (base, p1, p2) triple inside one scratch repo.
+    Triples where a side is unchanged (or both agree) are settled from the
+    content hashes alone, and those whose edits touch different fields by
+    merge_task_dicts; `git merge-file` takes the rest, and kdiff3 is only
+    opened for those that still have conflicting hunks (or don't merge to valid JSON).
+    With force_mergetool every triple goes straight to kdiff3.
+    """
+    if force_mergetool:
+        results: List[Optional[dict]] = [None] * len(conflicts)
+    else:
+        results = [_auto_merge(*triple) for triple in conflicts]
+    pending = [n for n, merged in enumerate(results) if merged is None]
+    if not pending:
+        return results
+    with scratch_repo() as tmpdir:
+        # With pygit2 the automatic merges run in-process; only kdiff3 still forks
+        repo = pygit2.Repository(tmpdir) if pygit2 is not None and not force_mergetool else None
+        for n in pending:
+            base_task, p1_task, p2_task = conflicts[n]
+            if force_mergetool:
+                merged = None
+            elif repo is not None:
+                merged = _merge_in_process(repo, base_task, p1_task, p2_task)
+            else:
+                merged = _merge_file(tmpdir, n, base_task, p1_task, p2_task)
+            if merged is None:
+                merged = _resolve_via_mergetool(tmpdir, f"TASK-{n}.json", base_task, p1_task, p2_task)
+            results[n] = merged
+        return results
+
+
+def _auto_merge(base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR) -> Optional[dict]:
+    """The merge result when no file merge is needed, else None."""
+    h_base = base_task.get_content_hash() if base_task else None
+    h_p1, h_p2 = p1_task.get_content_hash(), p2_task.get_content_hash()
+    if h_p1 == h_p2 or h_p2 == h_base:
+        return p1_task.to_dict(only_mergeable=True)
+    if h_p1 == h_base:
+        return p2_task.to_dict(only_mergeable=True)
+    base = base_task.to_dict(only_mergeable=True) if base_task else {}
+    p1, p2 = p1_task.to_dict(only_mergeable=True), p2_task.to_dict(only_mergeable=True)
+    merged, conflicted = merge_task_dicts(base, p1, p2)
+    return None if conflicted else merged
+
+
+_MISSING = object()
+
+
+def merge_task_dicts(base: dict, a: dict, b: dict) -> Tuple[dict, List[str]]:
+    """
+    Field-level 3-way merge. Per key: a one-sided change wins, matching
+    changes are kept, and keys both sides changed differently are
+    returned as conflicts (holding a's value in the merged dict).
+    """
+    merged = {}
+    conflicted = []
+    for key in dict.fromkeys([*base, *a, *b]):
+        v_base, v_a, v_b = base.get(key, _MISSING), a.get(key, _MISSING), b.get(key, _MISSING)
+        if v_a == v_b or v_b == v_base:
+            value = v_a
+        elif v_a == v_base:
+            value = v_b
+        else:
+            conflicted.append(key)
+            value = v_a
+        if value is not _MISSING:
+            merged[key] = value
+    return merged, conflicted
+
+
+def _stage_text(task_obj: Optional[TaskCIR]) -> str:
+    # IMPORTANT: Use the encoder to ensure Enums don't crash the hasher
+    return task_obj.to_json(only_mergeable=True) if task_obj else "{}"
+
+
+def _merge_file(
+    tmpdir: str, n: int, base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR
+) -> Optional[dict]:
+    """Non-interactive merge; returns None when a human has to decide."""
+    paths = []
+    for stage, task_obj in (("p1", p1_task), ("base", base_task), ("p2", p2_task)):
+        path = os.path.join(tmpdir, f"{n}.{stage}.json")
+        with open(path, "w") as f:
+            f.write(_stage_text(task_obj))
+        paths.append(path)
+    # Exit status is the number of conflicting hunks (negative on error)
+    res = subprocess.run(["git", "merge-file", "-p", *paths], cwd=tmpdir, capture_output=True, text=True)
+    if res.returncode != 0:
+        return None
+    try:
+        return TaskCIR.to_dict(TaskCIR.from_json(res.stdout))
+    except Exception:
+        return None
+
+
+def _merge_in_process(repo: Any, base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR) -> Optional[dict]:
+    """_merge_file through libgit2: blobs and the merge never leave the process."""
+    base, p1, p2 = (
+        pygit2.IndexEntry("TASK.json", repo.create_blob(_stage_text(t).encode()), pygit2.enums.FileMode.BLOB)
+        for t in (base_task, p1_task, p2_task)
+    )
+    # use_deprecated=False: the default returns only the merged text, without automergeable
+    res = repo.merge_file_from_index(base, p1, p2, use_deprecated=False)
+    if res is None or not res.automergeable:
+        return None
+    try:
+        return TaskCIR.to_dict(TaskCIR.from_json(res.contents))
+    except Exception:
+        return None
+
+
+# Times the user is sent back into the mergetool before the sync gives up
+MERGETOOL_ATTEMPTS = 3
+
+
+def _resolve_via_mergetool(
+    tmpdir: str, filename: str, base_task: Optional[TaskCIR], p1_task: TaskCIR, p2_task: TaskCIR
+) -> dict:
+    if not sys.stdin.isatty():
+        # No one to drive kdiff3 or answer prompts (cron, CI, pipes); fail instead of hanging
+        typer.secho(f"❌ Conflict in {p1_task.description!r} needs a mergetool, but stdin is not a terminal", fg="red")
+        raise typer.Abort()
 
-        while True:
-            subprocess.run(cmd, cwd=tmpdir)
-            try:
-                with open(full_merged_path) as f:
-                    return TaskCIR.to_dict(TaskCIR.from_json(f.read()))
-            except Exception as e:
-                typer.secho(f"❌ Merge Result Invalid: {e}", fg="red")
-                if not typer.confirm("Fix in editor?"):
-                    raise typer.Abort()
+    full_merged_path = os.path.join(tmpdir, filename)
+
+    def get_git_hash(task_obj: TaskCIR | None) -> str:
+        content = _stage_text(task_obj).encode()
+        # Same object `git hash-object -w` would write, without forking git for it
+        blob = b"blob %d\0" % len(content) + content
+        oid = hashlib.sha1(blob, usedforsecurity=False).hexdigest()
+        obj_dir = os.path.join(tmpdir, ".git", "objects", oid[:2])
+        obj_path = os.path.join(obj_dir, oid[2:])
+        # Objects are immutable and the scratch repo persists, so a stage seen before is already stored
+        if not os.path.exists(obj_path):
+            os.makedirs(obj_dir, exist_ok=True)
+            with open(obj_path, "wb") as f:
+                f.write(zlib.compress(blob))
+        return oid
+
+    # Generate the three stages
+    h_base = get_git_hash(base_task)
+    h_p1 = get_git_hash(p1_task)
+    h_p2 = get_git_hash(p2_task)
+
+    # Update index with the 3 stages
+    index_info = f"100644 {h_base} 1\t{filename}\n100644 {h_p1} 2\t{filename}\n100644 {h_p2} 3\t{filename}\n"
+    subprocess.run(["git", "update-index", "--index-info"], input=index_info, cwd=tmpdir, text=True)
+
+    # Write the 'Current' version to disk so kdiff3 has a file to edit
+    with open(full_merged_path, "w") as f:
+        f.write(p1_task.to_json(only_mergeable=True))
+
+    log.debug("merge stages B=%s P1=%s P2=%s", h_base, h_p1, h_p2)
+
+    # The config flags here prevent the 'mv' error even if kdiff3 fails
+    cmd = ["git", "-c", "mergetool.keepBackup=false", "mergetool", "--tool=kdiff3", "--no-prompt", filename]
+
+    for attempt in range(1, MERGETOOL_ATTEMPTS + 1):
+        subprocess.run(cmd, cwd=tmpdir)
+        try:
+            with open(full_merged_path) as f:
+                return TaskCIR.to_dict(TaskCIR.from_json(f.read()))
+        except Exception as e:
+            typer.secho(f"❌ Merge Result Invalid: {e}", fg="red")
+            if attempt == MERGETOOL_ATTEMPTS or not typer.confirm("Fix in editor?"):
+                raise typer.Abort() from e
+    raise typer.Abort()
 
 
 from tabulate import tabulate
@@ -271,25 +618,142 @@ def init():
     typer.secho("✅ Database initialized successfully.", fg="green")
 
 
-def translate_and_discover(plugin, task_dict, id_list, mgr):
-    """Translates Tool IDs to UUIDs; discovers unknown tasks via API."""
+def push_updates(pushes: List[Tuple[Any, ...]], workers: int = 10) -> Tuple[List[Optional[str]], Optional[Exception]]:
+    """
+    Runs queued update_task calls and returns (ids, error): the resulting ids
+    in order, None for pushes that failed or were not sent, and the first
+    exception raised, if any. Plugins whose capabilities declare
+    "concurrent_writes" get theirs over a thread pool; the rest run one by
+    one meanwhile, on this thread, and stop at the first failure.
+    """
+    results: List[Optional[str]] = [None] * len(pushes)
+    error: Optional[Exception] = None
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for i, (plugin, eid, task, target, *_) in enumerate(pushes):
+            if getattr(plugin, "capabilities", {}).get("concurrent_writes"):
+                futures[i] = pool.submit(plugin.update_task, eid, task, target)
+                continue
+            try:
+                results[i] = plugin.update_task(eid, task, target)
+            except Exception as e:
+                error = e
+                break
+        # Writes already submitted are waited for either way, so their results can be recorded
+        for i, future in futures.items():
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                error = error or e
+    return results, error
+
+
+def resolve_links(
+    plugin: Any,
+    task_dict: Dict[str, TaskCIR],
+    mgr: MappingManager,
+    workers: int = 10,
+    known: Optional[Dict[str, str]] = None,
+) -> Set[str]:
+    """
+    Rewrites depends/followers of every task in task_dict to internal uuids.
+    Tasks discovered on the way are appended to task_dict and have their own
+    links resolved in the next round, until no new ones turn up; each round's
+    unknown ids are fetched together. Returns the uuids of all tasks in task_dict.
+    """
+    uids: Set[str] = set()
+    done = 0
+    while done < len(task_dict):
+        # Only this round's tasks are copied; discovery appends to task_dict while they are processed
+        batch = dict(islice(task_dict.items(), done, None))
+        done = len(task_dict)
+        prefetched = prefetch_unknown(plugin, batch, mgr, workers, known)
+        for t in batch.values():
+            uids.add(t.uuid)
+            t.depends = translate_and_discover(plugin, task_dict, t.depends, mgr, prefetched, known)
+            t.followers = translate_and_discover(plugin, task_dict, t.followers, mgr, prefetched, known)
+            # Both are mergeable; a hash taken before the rewrite would be stale
+            t.forget_content_hash()
+    return uids
+
+
+def prefetch_unknown(
+    plugin: Any,
+    task_dict: Dict[str, TaskCIR],
+    mgr: MappingManager,
+    workers: int = 10,
+    known: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Fetches every task referenced from task_dict that is neither in it nor
+    mapped yet, in one go: via fetch_many when the plugin has it, otherwise
+    with fetch_one calls spread over a thread pool. `known` is the plugin's
+    preloaded id map (see MappingManager.load_id_map); without it the DB is asked per id.
+    """
+    ids = {str(tid) for t in task_dict.values() for tid in (*t.depends, *t.followers)}
+    if known is None:
+        known = {tid: uid for tid in ids if (uid := mgr.get_internal_uuid(plugin.name, tid))}
+    return fetch_unknown(plugin, [tid for tid in ids if tid not in task_dict and tid not in known], workers)
+
+
+def fetch_unknown(plugin: Any, tool_uids: List[str], workers: int = 10) -> Dict[str, Any]:
+    """{tool_uid: raw} for the ids that exist: one fetch_many call, or fetch_one over a thread pool."""
+    if not tool_uids:
+        return {}
+    if hasattr(plugin, "fetch_many"):
+        return plugin.fetch_many(tool_uids)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        raws = pool.map(plugin.fetch_one, tool_uids)
+        return {tid: raw for tid, raw in zip(tool_uids, raws) if raw}
+
+
+def translate_and_discover(
+    plugin: Any,
+    task_dict: Dict[str, TaskCIR],
+    id_list: Iterable[Any],
+    mgr: MappingManager,
+    prefetched: Optional[Dict[str, Any]] = None,
+    known: Optional[Dict[str, str]] = None,
+) -> List[str]:
+    """
+    Translates Tool IDs to UUIDs; discovers unknown tasks via API.
+    With `known` (the plugin's preloaded id map) lookups are dict hits,
+    and mappings created here are added to it.
+    """
     internal_uuids = []
+    name, get_uid, ensure_mapping = plugin.name, mgr.get_internal_uuid, mgr.ensure_mapping
+    if prefetched is None:
+        # No prefetch from the caller: the unknown ids are still fetched together, not one by one
+        unknown = [
+            tid
+            for tid in dict.fromkeys(map(str, id_list))
+            if tid not in task_dict and not (known.get(tid) if known is not None else get_uid(name, tid))
+        ]
+        prefetched = fetch_unknown(plugin, unknown)
     for tid in id_list:
+        tid = str(tid)
         # 1. Search DB (includes 'completed' status items)
-        uid = mgr.get_internal_uuid(plugin.name, str(tid))
+        uid = known.get(tid) if known is not None else get_uid(name, tid)
+
+        # Fetched this run but not mapped yet
+        if not uid and tid in task_dict:
+            uid = ensure_mapping(name, tid)
+            if known is not None:
+                known[tid] = uid
 
         # 2. On-Demand Discovery if totally unknown
         if not uid:
-            raw = plugin.fetch_one(str(tid))
+            raw = prefetched.get(tid)
             if raw:
                 cif = plugin.to_cif(raw)
-                uid = mgr.ensure_mapping(plugin.name, cif.tool_uid)
+                uid = ensure_mapping(name, cif.tool_uid)
+                if known is not None:
+                    known[cif.tool_uid] = uid
                 cif.uuid = uid
                 task_dict[cif.tool_uid] = cif
         if uid:
             internal_uuids.append(uid)
     return internal_uuids
 
-
 if __name__ == "__main__":
     app()
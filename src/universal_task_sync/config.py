@@ -1,5 +1,6 @@
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
@@ -12,6 +13,8 @@ else:
 CORE_DEFAULTS = {
     "difftool": "vimdiff",
     "sync_interval": "300",
+    # Threads used for concurrent network fetches during sync
+    "sync_workers": "10",
 }
 
 
@@ -23,17 +26,17 @@ def get_config() -> dict:
     Returns the final configuration dictionary:
     Default Manifest + User Overrides from settings.yaml
     """
-    cfg_manager = UniversalConfig()
-    manifest = get_full_manifest()
+    # Copy: the merged result is cached and shared
+    return dict(_merged_config())
 
-    if cfg_manager.config_file.exists():
-        try:
-            with open(cfg_manager.config_file) as f:
-                user_settings = yaml.safe_load(f) or {}
-                # Update defaults with user settings
-                manifest.update(user_settings)
-        except Exception as e:
-            print(f"⚠️ Error loading {cfg_manager.config_file}: {e}")
+
+@lru_cache(maxsize=1)
+def _merged_config() -> dict:
+    cfg_manager = get_universal_config()
+    # Copy: the manifest is cached and shared
+    manifest = dict(get_full_manifest())
+    # Update defaults with user settings
+    manifest.update(load_user_config())
 
     # Add the paths to the config so they are accessible everywhere
     manifest["_paths"] = {
@@ -46,12 +49,43 @@ def get_config() -> dict:
     return manifest
 
 
+@lru_cache(maxsize=1)
+def load_user_config() -> dict:
+    """
+    User overrides from settings.yaml, read once per process.
+    The returned dict is shared; copy it before changing it.
+    """
+    config_file = get_universal_config().config_file
+    if not config_file.exists():
+        return {}
+    try:
+        with open(config_file) as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"⚠️ Error loading {config_file}: {e}")
+        return {}
+
+
+def save_to_config_file(key: str, value) -> None:
+    """Persist one user setting to settings.yaml."""
+    settings = dict(load_user_config())
+    settings[key] = value
+    with open(get_universal_config().config_file, "w") as f:
+        yaml.safe_dump(settings, f, default_flow_style=False)
+    load_user_config.cache_clear()
+    _merged_config.cache_clear()
+
+
+@lru_cache(maxsize=1)
 def get_full_manifest() -> dict:
     """
     Discovery loop:
     1. Start with Core defaults.
     2. Find all installed UTS plugins via Entry Points.
     3. Load each plugin and merge its 'config_defaults' into the manifest.
+
+    Cached per process since discovery imports every plugin; the returned
+    dict is shared, so copy it before changing it.
     """
     manifest = CORE_DEFAULTS.copy()
 
@@ -90,3 +124,9 @@ class UniversalConfig:
         # Ensure existence
         self.config_home.mkdir(parents=True, exist_ok=True)
         self.data_home.mkdir(parents=True, exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def get_universal_config() -> UniversalConfig:
+    """The process-wide UniversalConfig; paths are resolved (and created) once."""
+    return UniversalConfig()
@@ -1,25 +1,65 @@
-import json
+import logging
 import os
 import sqlite3
 import uuid
+import zlib
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import typer
 
-from .base import BasePlugin
 from .models import TaskCIR
+from .serialization import json_dumps, json_loads
 
-SQL_DEBUG = True
+log = logging.getLogger(__name__)
+
+# Trace every statement to the debug log; set UTS_SQL_DEBUG=1 to turn it on
+SQL_DEBUG = os.getenv("UTS_SQL_DEBUG") == "1"
+
+# Bound parameters per IN (...) query; SQLite's default limit is 999
+SQL_PARAM_CHUNK = 900
+
+# Point statements run once per task (or per id). sqlite3 keeps compiled statements per connection
+# keyed by SQL text, so each one is written once here and every caller shares its cache entry.
+_SQL_GET_UUID = "SELECT internal_uuid FROM id_map WHERE service_name = ? AND external_id = ?"
+_SQL_GET_EXT_ID = "SELECT external_id FROM id_map WHERE service_name = ? AND internal_uuid = ?"
+_SQL_INSERT_MAP = "INSERT INTO id_map (internal_uuid, service_name, external_id, status) VALUES (?, ?, ?, 'active')"
+_SQL_GET_STATE = "SELECT content_hash, raw_json FROM sync_state WHERE internal_uuid = ?"
+
+# zlib level for stored merge bases; low levels get most of the size win on small JSON
+STATE_COMPRESS_LEVEL = 3
 
 
 def sql_logger(query: str) -> None:
-    print(f"DEBUG SQL: {query}")
+    log.debug("SQL: %s", query)
+
+
+def pack_state(data: Dict[str, Any]) -> bytes:
+    """Serializes a merge base for sync_state.raw_json as zlib-compressed JSON."""
+    return zlib.compress(json_dumps(data), STATE_COMPRESS_LEVEL)
 
 
+def unpack_state(stored: Any) -> Dict[str, Any]:
+    """
+    Inverse of pack_state. Rows written before compression hold plain JSON
+    TEXT (or bytes starting with '{'); those are parsed as they are.
+    """
+    if isinstance(stored, str) or stored[:1] == b"{":
+        return json_loads(stored)
+    return json_loads(zlib.decompress(stored))
+
+
+def new_uuids(count: int) -> List[str]:
+    """`count` random (version 4) UUID strings, drawn from a single urandom read."""
+    pool = os.urandom(16 * count)
+    return [str(uuid.UUID(bytes=pool[i : i + 16], version=4)) for i in range(0, len(pool), 16)]
+
+
+@lru_cache(maxsize=1)
 def get_data_dir() -> Path:
-    """Resolve the persistent data directory for the SQLite database."""
+    """Resolve the persistent data directory for the SQLite database; resolved (and created) once per process."""
     xdg_data = os.getenv("XDG_DATA_HOME")
     base = Path(xdg_data) if xdg_data else Path.home() / ".local" / "share"
     data_dir = base / "universal_task_sync"
@@ -27,13 +67,34 @@ def get_data_dir() -> Path:
     return data_dir
 
 
-def init_db() -> None:
+def connect(db_path: Path) -> sqlite3.Connection:
+    """
+    Opens a long-lived connection tuned for many small statements: WAL lets
+    readers run alongside the writer and, with synchronous=NORMAL, commits
+    skip the per-transaction fsync of the default rollback journal.
+    """
+    # Room for the fixed statements plus the chunked IN (...) variants
+    conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+    if SQL_DEBUG:
+        conn.set_trace_callback(sql_logger)
+        log.debug("Opening connection to %s", db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=67108864")
+    # ~20 MiB page cache (negative = KiB); it lives as long as the connection, so it stays warm
+    conn.execute("PRAGMA cache_size=-20000")
+    return conn
+
+
+def init_db(conn: Optional[sqlite3.Connection] = None) -> None:
     """Initializes the database with lean tables for mapping and state."""
-    db_path = get_data_dir() / "map.db"
-    with sqlite3.connect(db_path) as conn:
-        if SQL_DEBUG:
-            conn.set_trace_callback(sql_logger)
-            print(f"DEBUG: Opening connection to {db_path}")
+    own_conn = conn is None
+    if conn is None:
+        conn = connect(get_data_dir() / "map.db")
+    with conn:
+        # sqlite3 doesn't open a transaction for DDL, so each CREATE would commit (and sync) on its own
+        conn.execute("BEGIN")
         # Table 1: ID Map - Links internal UUIDs to service-specific IDs
         conn.execute("""
             CREATE TABLE IF NOT EXISTS id_map (
@@ -45,17 +106,41 @@ def init_db() -> None:
             )
         """)
 
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        # The PK serves (service, external_id) and service-wide scans. This one is led by the uuid for
+        # delete_mapping/set_status, which filter on it alone, and is covering for get_external_id,
+        # which then reads external_id from the index without touching the table
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_id_map_uuid ON id_map (internal_uuid, service_name, external_id)"
+        )
+
         # Table 2: Sync State - Stores the 'Last Known Good' state as a blob
         # This is the 'Base' for 3-way merges.
         conn.execute("""
             CREATE TABLE IF NOT EXISTS sync_state (
                 internal_uuid  TEXT PRIMARY KEY,
                 content_hash   TEXT NOT NULL,
-                raw_json       TEXT NOT NULL,
+                raw_json       BLOB NOT NULL,
                 last_modified  TEXT
             )
         """)
 
+        # Table 2b: Per-side hashes - what each service's copy looked like after the last sync.
+        # Lets each side be judged against its own last state instead of the shared merge base.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS side_state (
+                internal_uuid  TEXT NOT NULL,
+                service_name   TEXT NOT NULL,
+                content_hash   TEXT NOT NULL,
+                raw_hash       TEXT,
+                PRIMARY KEY (internal_uuid, service_name)
+            )
+        """)
+        # raw_hash arrived after side_state did; older databases get the column added
+        side_cols = {row[1] for row in conn.execute("PRAGMA table_info(side_state)")}
+        if "raw_hash" not in side_cols:
+            conn.execute("ALTER TABLE side_state ADD COLUMN raw_hash TEXT")
+
         # Table 3: Project Links - Remembers where -p maps to -t
         conn.execute("""
             CREATE TABLE IF NOT EXISTS project_map (
@@ -66,84 +151,280 @@ def init_db() -> None:
                 PRIMARY KEY (src_plugin, src_project, dst_plugin)
             )
         """)
-        conn.commit()
+
+        # Table 4: Sync Cursors - a digest of both sides' raw records as of the last complete sync,
+        # so a sync where neither side changed can stop right after fetching
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sync_cursor (
+                a_plugin     TEXT NOT NULL,
+                a_filter     TEXT NOT NULL,
+                b_plugin     TEXT NOT NULL,
+                b_filter     TEXT NOT NULL,
+                fingerprint  TEXT NOT NULL,
+                last_run     TEXT,
+                PRIMARY KEY (a_plugin, a_filter, b_plugin, b_filter)
+            )
+        """)
+        # Superseded by idx_id_map_uuid, which answers the same lookups; it only added write cost
+        conn.execute("DROP INDEX IF EXISTS idx_svc_uid")
+        if "idx_id_map_uuid" not in indexes:
+            # Fresh statistics so the planner picks the new indexes straight away
+            conn.execute("ANALYZE")
+    if own_conn:
+        conn.close()
 
 
 class MappingManager:
     def __init__(self) -> None:
         self.db_path = get_data_dir() / "map.db"
-        init_db()
+        # One connection for the manager's lifetime; each method is a transaction on it
+        self.conn = connect(self.db_path)
+        init_db(self.conn)
+        # State writes queued between begin_batch() and flush_batch(); None when not batching
+        self._pending_states: Optional[List[Tuple[str, str, bytes, str]]] = None
+        self._pending_sides: Optional[List[Tuple[str, str, Optional[str], Optional[str]]]] = None
+        self._pending_links: Optional[List[Tuple[str, str, str, str, str]]] = None
+        self._pending_status: Optional[List[Tuple[str, str]]] = None
+        # last_modified stamped on every state queued in the current batch, taken once at begin_batch()
+        self._batch_now: Optional[str] = None
+        # Point lookups memoized for the manager's lifetime (misses too); any id_map write clears both
+        self._uid_cache: Dict[Tuple[str, str], Optional[str]] = {}
+        self._ext_cache: Dict[Tuple[str, str], Optional[str]] = {}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __del__(self) -> None:
+        conn = self.__dict__.get("conn")
+        if conn is not None:
+            conn.close()
+
+    def begin_batch(self) -> None:
+        """
+        Queue create_mapping, set_status and sync/side state writes in memory
+        until flush_batch(). Lookups don't see queued rows before the flush.
+        """
+        if self._pending_states is None:
+            self._pending_states, self._pending_sides = [], []
+            self._pending_links, self._pending_status = [], []
+            self._batch_now = datetime.now().isoformat()
+
+    def flush_batch(self) -> None:
+        """Write every queued row in a single transaction and stop batching."""
+        states, sides = self._pending_states, self._pending_sides
+        links, statuses = self._pending_links, self._pending_status
+        self._pending_states = self._pending_sides = self._pending_links = self._pending_status = None
+        self._batch_now = None
+        if not (states or sides or links or statuses):
+            return
+        if links:
+            self._remember_links(links)
+        with self.conn as conn:
+            self._write_links(conn, links)
+            self._write_status(conn, statuses)
+            self._write_states(conn, states)
+            self._write_sides(conn, sides)
 
     def set_status(self, internal_id: str, status: str) -> None:
         """Update status to 'active' or 'completed'."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("UPDATE id_map SET status = ? WHERE internal_uuid = ?", (status, internal_id))
+        if self._pending_status is not None:
+            self._pending_status.append((status, internal_id))
+            return
+        with self.conn as conn:
+            self._write_status(conn, [(status, internal_id)])
+
+    @staticmethod
+    def _write_status(conn: sqlite3.Connection, rows: List[Tuple[str, str]]) -> None:
+        conn.executemany("UPDATE id_map SET status = ? WHERE internal_uuid = ?", rows)
 
     # --- Sync State & 3-Way Merge Logic ---
     def ensure_mapping(self, service_name: str, external_id: str) -> str:
         """Find or create mapping, ensuring status is reset to active if reopened."""
-        with sqlite3.connect(self.db_path) as conn:
-            row = conn.execute(
-                "SELECT internal_uuid FROM id_map WHERE service_name = ? AND external_id = ?",
-                (service_name, str(external_id)),
-            ).fetchone()
+        self._forget_ids()
+        ext_id = str(external_id)
+        with self.conn as conn:
+            row = conn.execute(_SQL_GET_UUID, (service_name, ext_id)).fetchone()
             if row:
                 uid = row[0]
                 conn.execute(
                     "UPDATE id_map SET status = 'active' WHERE  service_name=? AND external_id=?",
-                    (service_name, external_id),
+                    (service_name, ext_id),
                 )
                 return uid
 
             new_uid = str(uuid.uuid4())
-            conn.execute(
-                "INSERT INTO id_map (internal_uuid, service_name, external_id, status) VALUES (?, ?, ?, 'active')",
-                (new_uid, service_name, str(external_id)),
-            )
+            conn.execute(_SQL_INSERT_MAP, (new_uid, service_name, ext_id))
             return new_uid
 
+    def ensure_mappings(self, service_name: str, external_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        ensure_mapping() for many ids at once: existing links are read and
+        reactivated with chunked queries, new ones inserted in one executemany.
+        Returns {external_id: internal_uuid}.
+        """
+        ext_ids = [str(e) for e in external_ids]
+        found: Dict[str, str] = {}
+        self._forget_ids()
+        with self.conn as conn:
+            for start in range(0, len(ext_ids), SQL_PARAM_CHUNK):
+                chunk = ext_ids[start : start + SQL_PARAM_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                found.update(
+                    conn.execute(
+                        "SELECT external_id, internal_uuid FROM id_map "
+                        f"WHERE service_name = ? AND external_id IN ({marks})",
+                        (service_name, *chunk),
+                    )
+                )
+                conn.execute(
+                    "UPDATE id_map SET status = 'active' "
+                    f"WHERE service_name = ? AND external_id IN ({marks}) AND status != 'active'",
+                    (service_name, *chunk),
+                )
+            new_ids = [e for e in dict.fromkeys(ext_ids) if e not in found]
+            new_rows = [(uid, service_name, e) for uid, e in zip(new_uuids(len(new_ids)), new_ids)]
+            conn.executemany(
+                _SQL_INSERT_MAP,
+                new_rows,
+            )
+        found.update((ext_id, uid) for uid, _, ext_id in new_rows)
+        return found
+
+    def load_id_map(self, service: str) -> Dict[str, str]:
+        """Every {external_id: internal_uuid} link for one service, in a single SELECT."""
+        with self.conn as conn:
+            rows = conn.execute("SELECT external_id, internal_uuid FROM id_map WHERE service_name = ?", (service,))
+            id_map = dict(rows)
+        # Warms get_internal_uuid for the rest of the run
+        self._uid_cache.update(((service, ext_id), uid) for ext_id, uid in id_map.items())
+        return id_map
+
     def update_sync_state(self, task: TaskCIR) -> None:
         """Captures the full state of the task to act as the future Merge Base."""
         content_hash = task.get_content_hash()
-        # We store the FULL JSON including system fields for total recovery
-        raw_json = task.to_json(only_mergeable=True)
+        raw_json = pack_state(task.to_dict(only_mergeable=True))
+        row = (task.uuid, content_hash, raw_json, self._batch_now or datetime.now().isoformat())
 
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO sync_state
-                (internal_uuid, content_hash, raw_json, last_modified)
-                VALUES (?, ?, ?, ?)
-            """,
-                (task.uuid, content_hash, raw_json, datetime.now().isoformat()),
-            )
+        if self._pending_states is not None:
+            self._pending_states.append(row)
+            return
+        with self.conn as conn:
+            self._write_states(conn, [row])
+
+    def update_side_hashes(
+        self,
+        internal_uuid: str,
+        hashes: Dict[str, Optional[str]],
+        raw_hashes: Optional[Dict[str, Optional[str]]] = None,
+    ) -> None:
+        """
+        Record each service's post-sync hash; None forgets it (e.g. after a write we haven't read back).
+        raw_hashes optionally adds the fingerprint of the raw record that hash was computed from.
+        """
+        raw_hashes = raw_hashes or {}
+        rows = [(internal_uuid, service, h, raw_hashes.get(service)) for service, h in hashes.items()]
+        if self._pending_sides is not None:
+            self._pending_sides.extend(rows)
+            return
+        with self.conn as conn:
+            self._write_sides(conn, rows)
+
+    @staticmethod
+    def _write_states(conn: sqlite3.Connection, rows: List[Tuple[str, str, bytes, str]]) -> None:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO sync_state
+            (internal_uuid, content_hash, raw_json, last_modified)
+            VALUES (?, ?, ?, ?)
+        """,
+            rows,
+        )
+
+    @staticmethod
+    def _write_sides(conn: sqlite3.Connection, rows: List[Tuple[str, str, Optional[str], Optional[str]]]) -> None:
+        conn.executemany(
+            "DELETE FROM side_state WHERE internal_uuid = ? AND service_name = ?",
+            [(uid, service) for uid, service, content_hash, _ in rows if content_hash is None],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO side_state (internal_uuid, service_name, content_hash, raw_hash) "
+            "VALUES (?, ?, ?, ?)",
+            [row for row in rows if row[2] is not None],
+        )
 
     def delete_mapping(self, internal_id: str) -> None:
         """
         Removes the sync memory for a task.
         Usually called when a task is completed/deleted on both sides.
         """
-        with sqlite3.connect(self.db_path) as conn:
+        self._forget_ids()
+        with self.conn as conn:
             # Remove the service links (e.g. TW UUID <-> GH ID)
             conn.execute("DELETE FROM id_map WHERE internal_uuid = ?", (internal_id,))
             # Remove the content hash/snapshot
             conn.execute("DELETE FROM sync_state WHERE internal_uuid = ?", (internal_id,))
+            conn.execute("DELETE FROM side_state WHERE internal_uuid = ?", (internal_id,))
         typer.echo(f"  🧹 Mapping cleared for internal task {internal_id[:8]}")
 
     def get_sync_state(self, internal_uuid: str) -> Optional[Dict[str, Any]]:
         """Retrieves the hash and data for change detection."""
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
-            row = conn.execute(
-                "SELECT content_hash, raw_json FROM sync_state WHERE internal_uuid = ?", (internal_uuid,)
-            ).fetchone()
+        with self.conn as conn:
+            row = conn.execute(_SQL_GET_STATE, (internal_uuid,)).fetchone()
             if row:
-                return {"hash": row[0], "data": json.loads(row[1])}
+                return {"hash": row[0], "data": unpack_state(row[1])}
             return None
 
+    def reverse_map(self, services: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Every link of the given services in one SELECT, as
+        {service: {internal_uuid: external_id}} - get_external_id for all of them at once.
+        """
+        services = list(dict.fromkeys(services))
+        ext_by_uid: Dict[str, Dict[str, str]] = {service: {} for service in services}
+        marks = ",".join("?" * len(services))
+        with self.conn as conn:
+            rows = conn.execute(
+                f"SELECT service_name, internal_uuid, external_id FROM id_map WHERE service_name IN ({marks})",
+                services,
+            )
+            for service, uid, ext_id in rows:
+                ext_by_uid[service][uid] = ext_id
+        # Warms get_external_id for the rest of the run (plugins resolve links through it)
+        for service, links in ext_by_uid.items():
+            self._ext_cache.update(((service, uid), ext_id) for uid, ext_id in links.items())
+        return ext_by_uid
+
+    def load_states(self, internal_uuids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Loads sync states for many tasks with a few chunked SELECTs.
+        Returns {internal_uuid: state}, matching what get_sync_state returns one
+        at a time; each state also carries "sides", its per-service hashes, and
+        "raws", the raw-record fingerprints behind them.
+        """
+        uuids: List[str] = list(internal_uuids)
+        state_by_uid: Dict[str, Dict[str, Any]] = {}
+
+        with self.conn as conn:
+            for start in range(0, len(uuids), SQL_PARAM_CHUNK):
+                chunk = uuids[start : start + SQL_PARAM_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT internal_uuid, content_hash, raw_json FROM sync_state WHERE internal_uuid IN ({marks})",
+                    chunk,
+                )
+                for uid, content_hash, raw_json in rows:
+                    state_by_uid[uid] = {"hash": content_hash, "data": unpack_state(raw_json), "sides": {}, "raws": {}}
+                rows = conn.execute(
+                    "SELECT internal_uuid, service_name, content_hash, raw_hash FROM side_state "
+                    f"WHERE internal_uuid IN ({marks})",
+                    chunk,
+                )
+                for uid, service, content_hash, raw_hash in rows:
+                    if uid in state_by_uid:
+                        state_by_uid[uid]["sides"][service] = content_hash
+                        state_by_uid[uid]["raws"][service] = raw_hash
+        return state_by_uid
+
     def get_sync_base(self, internal_uuid: str) -> Optional[TaskCIR]:
         """Reconstructs the TaskCIR object for use as Stage 1 in Git Mergetool."""
         state = self.get_sync_state(internal_uuid)
@@ -151,53 +432,85 @@ class MappingManager:
 
     # --- Identity & Mapping ---
 
+    def _forget_ids(self) -> None:
+        self._uid_cache.clear()
+        self._ext_cache.clear()
+
+    def _remember_links(self, rows: List[Tuple[str, str, str, str, str]]) -> None:
+        """Brings the lookup caches in line with queued create_mapping rows instead of dropping them."""
+        written = {(service, ext_id): uid for uid, service, ext_id, _, _ in rows}
+        # A remapped external id no longer belongs to the uuid it was cached under
+        self._ext_cache = {
+            key: ext_id for key, ext_id in self._ext_cache.items() if written.get((key[0], ext_id), key[1]) == key[1]
+        }
+        self._ext_cache.update(((service, uid), ext_id) for (service, ext_id), uid in written.items())
+        self._uid_cache.update(written)
+
     def get_internal_uuid(self, service: str, external_id: str) -> Optional[str]:
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
-            row = conn.execute(
-                "SELECT internal_uuid FROM id_map WHERE service_name = ? AND external_id = ?", (service, external_id)
-            ).fetchone()
-            return row[0] if row else None
+        key = (service, external_id)
+        if key in self._uid_cache:
+            return self._uid_cache[key]
+        with self.conn as conn:
+            row = conn.execute(_SQL_GET_UUID, (service, external_id)).fetchone()
+        uid = self._uid_cache[key] = row[0] if row else None
+        return uid
 
     def create_mapping(self, service: str, external_id: str, existing_uuid: str | None = None) -> str:
         """
         Links an external ID to an internal UUID.
         If existing_uuid is provided (from Reconciler), it 'bridges' the tasks.
         """
-        print(f"{service=}")
-        new_uuid = existing_uuid or str(uuid.uuid4())[:16]
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
-            # INSERT OR REPLACE ensures that if we are re-mapping
-            # a task to a different internal group, it updates correctly.
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO id_map (internal_uuid, service_name, external_id, status)
-                VALUES (?, ?, ?,
-                    COALESCE((SELECT status FROM id_map WHERE internal_uuid=? AND service_name=?), 'active')
-                )
-                """,
-                (new_uuid, service, str(external_id), new_uuid, service),
-            )
+        new_uuid = existing_uuid or str(uuid.uuid4())
+        row = (new_uuid, service, str(external_id), new_uuid, service)
+        if self._pending_links is not None:
+            self._pending_links.append(row)
+            return new_uuid
+        self._forget_ids()
+        with self.conn as conn:
+            self._write_links(conn, [row])
         return new_uuid
 
-    def get_external_id(self, service: BasePlugin, internal_uuid: str) -> Optional[str]:
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
-            row = conn.execute(
-                "SELECT external_id FROM id_map WHERE service_name = ? AND internal_uuid = ?", (service, internal_uuid)
-            ).fetchone()
-            return row[0] if row else None
+    def commit_mappings(self, links: Iterable[Tuple[str, str, str]]) -> None:
+        """
+        create_mapping for many (service, external_id, internal_uuid) links,
+        written in one transaction straight away even inside a batch: they
+        belong to tasks that already exist remotely, so they must outlive a
+        sync that fails before flush_batch().
+        """
+        rows = [(uid, service, str(ext_id), uid, service) for service, ext_id, uid in links]
+        if not rows:
+            return
+        self._remember_links(rows)
+        with self.conn as conn:
+            self._write_links(conn, rows)
+
+    @staticmethod
+    def _write_links(conn: sqlite3.Connection, rows: List[Tuple[str, str, str, str, str]]) -> None:
+        # INSERT OR REPLACE ensures that if we are re-mapping
+        # a task to a different internal group, it updates correctly.
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO id_map (internal_uuid, service_name, external_id, status)
+            VALUES (?, ?, ?,
+                COALESCE((SELECT status FROM id_map WHERE internal_uuid=? AND service_name=?), 'active')
+            )
+            """,
+            rows,
+        )
+
+    def get_external_id(self, service: str, internal_uuid: str) -> Optional[str]:
+        key = (service, internal_uuid)
+        if key in self._ext_cache:
+            return self._ext_cache[key]
+        with self.conn as conn:
+            row = conn.execute(_SQL_GET_EXT_ID, (service, internal_uuid)).fetchone()
+        ext_id = self._ext_cache[key] = row[0] if row else None
+        return ext_id
 
     # --- Project Connectivity ---
 
     def store_project_link(self, src_p: str, src_proj: str, dst_p: str, dst_t: str) -> None:
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
+        with self.conn as conn:
             conn.execute(
                 """
                 INSERT OR REPLACE INTO project_map VALUES (?, ?, ?, ?)
@@ -206,9 +519,7 @@ class MappingManager:
             )
 
     def get_stored_target(self, src_p: str, src_proj: str, dst_p: str) -> Optional[str]:
-        with sqlite3.connect(self.db_path) as conn:
-            if SQL_DEBUG:
-                conn.set_trace_callback(sql_logger)
+        with self.conn as conn:
             row = conn.execute(
                 """
                 SELECT dst_target FROM project_map
@@ -217,3 +528,29 @@ class MappingManager:
                 (src_p, src_proj, dst_p),
             ).fetchone()
             return row[0] if row else None
+
+    def get_cursor(self, a_p: str, a_f: str, b_p: str, b_f: str) -> Optional[str]:
+        """The fingerprint stored by the last complete sync of this pair, if any."""
+        with self.conn as conn:
+            row = conn.execute(
+                """
+                SELECT fingerprint FROM sync_cursor
+                WHERE a_plugin=? AND a_filter=? AND b_plugin=? AND b_filter=?
+            """,
+                (a_p, a_f, b_p, b_f),
+            ).fetchone()
+            return row[0] if row else None
+
+    def clear_cursors(self) -> None:
+        """Forgets every stored cursor, so the next sync of each pair runs in full."""
+        with self.conn as conn:
+            conn.execute("DELETE FROM sync_cursor")
+
+    def store_cursor(self, a_p: str, a_f: str, b_p: str, b_f: str, fingerprint: str) -> None:
+        with self.conn as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO sync_cursor VALUES (?, ?, ?, ?, ?, ?)
+            """,
+                (a_p, a_f, b_p, b_f, fingerprint, datetime.now().isoformat()),
+            )
@@ -0,0 +1,93 @@
+import hashlib
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import TaskCIR
+from .serialization import json_dumps
+
+
+def to_cif_all(plugin: Any, raws: Iterable[Any]) -> List[TaskCIR]:
+    """Converts raw records, using the plugin's batch translator when it has one."""
+    if hasattr(plugin, "to_cif_many"):
+        return plugin.to_cif_many(raws)
+    return [plugin.to_cif(r) for r in raws]
+
+
+def fetch_tasks(plugin: Any) -> Tuple[Dict[str, TaskCIR], Dict[str, Optional[str]]]:
+    """
+    Fetches and translates everything under the plugin's filter. Returns the
+    tasks and the raw-record fingerprints, both keyed by tool_uid.
+    """
+    fingerprints = []
+
+    def fingerprinted(raws: Iterable[Any]) -> Iterator[Any]:
+        for raw in raws:
+            fingerprints.append(raw_fingerprint(plugin, raw))
+            yield raw
+
+    # Translation is one task per raw record, in order, so the two line up
+    tasks = to_cif_all(plugin, fingerprinted(stream_in_background(plugin.fetch_raw())))
+    return {t.tool_uid: t for t in tasks}, {t.tool_uid: fp for t, fp in zip(tasks, fingerprints)}
+
+
+def raw_fingerprint(plugin: Any, raw: Any) -> Optional[str]:
+    """A cheap digest of a raw record (the plugin's raw_hash() if it has one); None if it can't be taken."""
+    if hasattr(plugin, "raw_hash"):
+        return plugin.raw_hash(raw)
+    try:
+        return hashlib.blake2b(json_dumps(raw, sort_keys=True), digest_size=16).hexdigest()
+    except TypeError:
+        return None
+
+
+def snapshot_fingerprint(raws_a: dict, raws_b: dict) -> Optional[str]:
+    """
+    One digest over both sides' {tool_uid: raw fingerprint} maps; it changes
+    when any record is added, removed or edited. None if a record had no fingerprint.
+    """
+    snapshot = []
+    for raws in (raws_a, raws_b):
+        if None in raws.values():
+            return None
+        snapshot.append(sorted((str(tid), fp) for tid, fp in raws.items()))
+    return hashlib.blake2b(json_dumps(snapshot), digest_size=16).hexdigest()
+
+
+def links_outside(tasks: Dict[str, TaskCIR]) -> bool:
+    """Whether any task depends on or is followed by one that isn't in `tasks` (keyed by tool_uid)."""
+    return any(str(tid) not in tasks for t in tasks.values() for tid in (*t.depends, *t.followers))
+
+
+_STREAM_DONE = object()
+
+
+def stream_in_background(raws: Iterable[Any], maxsize: int = 100) -> Iterable[Any]:
+    """
+    Drains a lazy fetch_raw() iterator on a producer thread, so the next page
+    is already in flight while the caller translates this one. Lists are
+    returned as-is; there is nothing left to wait for.
+    """
+    if isinstance(raws, (list, tuple)):
+        return raws
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def produce() -> None:
+        try:
+            for raw in raws:
+                items.put(raw)
+            items.put(_STREAM_DONE)
+        except BaseException as e:
+            items.put(e)
+
+    def consume() -> Iterator[Any]:
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            item = items.get()
+            if item is _STREAM_DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    return consume()
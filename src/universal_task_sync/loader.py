@@ -1,22 +1,31 @@
 import importlib.metadata
+from functools import lru_cache
+from typing import Dict
 
 import typer
 
 
+@lru_cache(maxsize=1)
+def _plugin_entry_points() -> Dict[str, importlib.metadata.EntryPoint]:
+    """Entry points of the 'universal_task_sync.plugins' group by name; metadata is scanned once per process."""
+    return {ep.name: ep for ep in importlib.metadata.entry_points(group="universal_task_sync.plugins")}
+
+
 def get_plugin(name: str):
     """
     Dynamically loads a plugin registered under the
     'universal_task_sync.plugins' entry point group.
+    Every call returns a new instance: both sides of a sync may use the same
+    plugin with different filters.
     """
-    # Find all entry points for our group
-    eps = importlib.metadata.entry_points(group="universal_task_sync.plugins")
+    eps = _plugin_entry_points()
 
     # Try to find the one matching the requested name (e.g., 'tw' or 'github')
-    plugin_entry = next((ep for ep in eps if ep.name == name), None)
+    plugin_entry = eps.get(name)
 
     if not plugin_entry:
         typer.secho(f"❌ Plugin '{name}' not found.", fg=typer.colors.RED, err=True)
-        installed = [ep.name for ep in eps]
+        installed = list(eps)
         if installed:
             typer.echo(f"Available plugins: {', '.join(installed)}")
         else:
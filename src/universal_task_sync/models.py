@@ -1,11 +1,12 @@
 import hashlib
 import json
-from dataclasses import asdict, dataclass, field, fields, replace
+from dataclasses import MISSING, dataclass, field, fields, replace
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Union, get_type_hints
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Type, Union, get_type_hints
 
-from .serialization import TaskJSONEncoder, parse_iso_datetime, parse_iso_duration
+from .serialization import TaskJSONEncoder, json_dumps, json_loads, parse_iso_datetime, parse_iso_duration
 
 
 class TaskStatus(Enum):
@@ -21,6 +22,59 @@ class Priority(Enum):
     LOW = "L"
 
 
+# Tags the hash algorithm: stored md5 hashes from older versions never compare equal,
+# so each task is re-judged once (and settled without a write if both sides agree)
+CONTENT_HASH_PREFIX = "b2:"
+
+
+def _enum_decoder(enum_cls: Type[Enum]) -> Callable[[Any], Any]:
+    # Value index first; the constructor still raises on bad values
+    return lambda value: enum_cls._value2member_map_.get(value) or enum_cls(value)
+
+
+def _decoder_for(field_type: Any) -> Optional[Callable[[Any], Any]]:
+    """The parser from_dict applies to non-None values of a field, or None to keep them as they are."""
+    # 1. Handle Datetimes
+    if field_type == datetime or field_type == Optional[datetime]:
+        return lambda value: parse_iso_datetime(value) if isinstance(value, str) else value
+
+    # 2. Handle Durations (timedelta)
+    if field_type == timedelta or field_type == Optional[timedelta]:
+        return lambda value: parse_iso_duration(value) if isinstance(value, str) else value
+
+    # 3. Handle Enums
+    if isinstance(field_type, type) and issubclass(field_type, Enum):
+        return _enum_decoder(field_type)
+
+    if field_type == List[str]:
+        return list
+
+    # 4. Handle Optionals of Enums (Generic parsing)
+    if getattr(field_type, "__origin__", None) is Union:
+        # Basic check for Enum in Union (Optional[Priority])
+        inner_types = [t for t in field_type.__args__ if isinstance(t, type) and issubclass(t, Enum)]
+        if inner_types:
+            return _enum_decoder(inner_types[0])
+    return None
+
+
+@lru_cache(maxsize=None)
+def _field_decoders(cls: type) -> Dict[str, Optional[Callable[[Any], Any]]]:
+    # get_type_hints re-evaluates every annotation; the answer never changes per class
+    return {name: _decoder_for(field_type) for name, field_type in get_type_hints(cls).items()}
+
+
+@lru_cache(maxsize=None)
+def _construction_plan(cls: type) -> Tuple[FrozenSet[str], Dict[str, Any], Dict[str, Callable[[], Any]]]:
+    """
+    What from_dict needs to fill an instance directly: the field names, the
+    plain defaults and the default factories. Worked out once per class.
+    """
+    defaults = {f.name: f.default for f in fields(cls) if f.default is not MISSING}
+    factories = {f.name: f.default_factory for f in fields(cls) if f.default_factory is not MISSING}
+    return frozenset(f.name for f in fields(cls)), defaults, factories
+
+
 @dataclass
 class TaskCIR:
     # --- Identification & Type ---
@@ -64,10 +118,18 @@ class TaskCIR:
 
     def copy(self) -> "TaskCIR":
         """
-        Creates a deep copy of the task.
-        Uses dataclasses.replace to ensure all fields (including metadata) are preserved.
+        Creates a copy of the task whose lists and dicts are its own.
+        Built from __dict__ rather than dataclasses.replace, so __init__ and
+        field reflection are skipped and a cached content hash carries over.
         """
-        return replace(self)
+        new = object.__new__(TaskCIR)
+        state = self.__dict__.copy()
+        state["tags"] = list(self.tags)
+        state["depends"] = list(self.depends)
+        state["followers"] = list(self.followers)
+        state["custom_fields"] = dict(self.custom_fields)
+        new.__dict__.update(state)
+        return new
 
     def update_from(self, merged_data: dict) -> None:
         """
@@ -77,23 +139,51 @@ class TaskCIR:
         This method is 'identity-safe': it only updates fields that were
         part of the merge, leaving uuid, tool_id, and last_modified alone.
         """
-        for f in fields(self):
+        for name in _MERGEABLE_NAMES:
             # Only update if the field is mergeable AND exists in the truth dict
-            if f.metadata.get("merge", True) and f.name in merged_data:
-                setattr(self, f.name, merged_data[f.name])
+            if name in merged_data:
+                setattr(self, name, merged_data[name])
+        self.forget_content_hash()
+
+    def with_updates(self, merged_data: dict) -> "TaskCIR":
+        """
+        Functional update_from(): a new task with the mergeable fields from
+        merged_data. The copy is shallow, so untouched lists and dicts are
+        shared with self rather than duplicated.
+        """
+        return replace(self, **{k: v for k, v in merged_data.items() if k in _MERGEABLE_FIELDS})
 
     def to_dict(self, only_mergeable: bool = False) -> dict:
-        if not only_mergeable:
-            return asdict(self)
-        return {f.name: getattr(self, f.name) for f in fields(self) if f.metadata.get("merge", True)}
+        """
+        Field values by name. Shallow: lists and dicts are the task's own,
+        so copy them before changing them.
+        """
+        names = _MERGEABLE_NAMES if only_mergeable else _FIELD_NAMES
+        return {name: getattr(self, name) for name in names}
 
     def get_content_hash(self) -> str:
         """
         Hashes only mergeable fields.
-        Uses to_json(only_mergeable=True) to ensure a stable, stringified representation.
+        Uses compact key-sorted JSON bytes (orjson when installed) for a stable representation.
+        Cached after the first call, until forget_content_hash().
+        """
+        cached = self.__dict__.get("_content_hash")
+        if cached is None:
+            content = json_dumps(self.to_dict(only_mergeable=True), sort_keys=True)
+            digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+            cached = self.__dict__["_content_hash"] = CONTENT_HASH_PREFIX + digest
+        return cached
+
+    def assume_content_hash(self, content_hash: str) -> None:
+        """Seed the hash cache when the caller already knows the content (e.g. from an unchanged raw record)."""
+        self.__dict__["_content_hash"] = content_hash
+
+    def forget_content_hash(self) -> None:
+        """
+        Drop the cached hash. Assignments are not tracked, so whoever changes a
+        mergeable field of a task that may have been hashed calls this.
         """
-        content_json = self.to_json(only_mergeable=True)
-        return hashlib.md5(content_json.encode()).hexdigest()
+        self.__dict__.pop("_content_hash", None)
 
     def to_json(self, only_mergeable: bool = False) -> str:
         """Helper to dump this specific task using the standard encoder."""
@@ -104,48 +194,36 @@ class TaskCIR:
     def from_dict(cls, data: dict) -> "TaskCIR":
         """
         Dynamic Decoder: Inspects the dataclass type hints to decide
-        which parser (datetime, duration, enum) to use.
+        which parser (datetime, duration, enum) to use. The choice is made
+        once per field (see _field_decoders), not per value.
         """
-        hints = get_type_hints(cls)
+        decoders = _field_decoders(cls)
         processed_data = {}
 
         for name, value in data.items():
-            if value is None:
-                processed_data[name] = None
-                continue
-
-            field_type = hints.get(name)
-
-            # 1. Handle Datetimes
-            if field_type == datetime or field_type == Optional[datetime]:
-                processed_data[name] = parse_iso_datetime(value) if isinstance(value, str) else value
-
-            # 2. Handle Durations (timedelta)
-            elif field_type == timedelta or field_type == Optional[timedelta]:
-                processed_data[name] = parse_iso_duration(value) if isinstance(value, str) else value
-
-            # 3. Handle Enums
-            elif isinstance(field_type, type) and issubclass(field_type, Enum):
-                processed_data[name] = field_type(value)
-
-            elif field_type == List[str]:
-                processed_data[name] = list(value)
-            elif hasattr(field_type, "__origin__") and field_type.__origin__ is list:
-                processed_data[name] = value
-
-            # 4. Handle Optionals of Enums (Generic parsing)
-            elif hasattr(field_type, "__origin__") and field_type.__origin__ is Union:
-                # Basic check for Enum in Union (Optional[Priority])
-                inner_types = [t for t in field_type.__args__ if isinstance(t, type) and issubclass(t, Enum)]
-                if inner_types:
-                    processed_data[name] = inner_types[0](value)
-                else:
-                    processed_data[name] = value
-            else:
-                processed_data[name] = value
-
-        return cls(**processed_data)
+            decode = decoders.get(name)
+            processed_data[name] = value if decode is None or value is None else decode(value)
+
+        names, defaults, factories = _construction_plan(cls)
+        if not processed_data.keys() <= names:
+            raise TypeError(f"{cls.__name__} got unexpected fields: {sorted(processed_data.keys() - names)}")
+        # Same result as cls(**processed_data), minus the generated __init__'s argument handling
+        task = cls.__new__(cls)
+        state = task.__dict__
+        state.update(defaults)
+        for name, factory in factories.items():
+            if name not in processed_data:
+                state[name] = factory()
+        state.update(processed_data)
+        return task
 
     @classmethod
     def from_json(cls, json_str: str) -> "TaskCIR":
-        return cls.from_dict(json.loads(json_str))
+        return cls.from_dict(json_loads(json_str))
+
+
+# Field names in declaration order, worked out once instead of per to_dict()/hash
+_FIELD_NAMES = tuple(f.name for f in fields(TaskCIR))
+_MERGEABLE_NAMES = tuple(f.name for f in fields(TaskCIR) if f.metadata.get("merge", True))
+# Names whose values feed get_content_hash()
+_MERGEABLE_FIELDS = frozenset(_MERGEABLE_NAMES)
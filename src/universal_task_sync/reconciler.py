@@ -1,8 +1,10 @@
-from typing import Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
 
 import typer
 
 from .db import MappingManager
+from .fetch import fetch_tasks
 from .models import TaskCIR
 
 reconcile_app = typer.Typer(help="Manually link tasks between services to rebuild mapping memory.")
@@ -36,40 +38,72 @@ def main(
     src = get_plugin(input_plugin)
     dst = get_plugin(output_plugin)
 
+    src.set_filter(src_target)
+    dst.set_filter(dst_target)
+    # One at a time: authentication may prompt for credentials
     src.authenticate()
     dst.authenticate()
 
     typer.secho(f"🚀 Reconciling {input_plugin}:{src_target} <-> {output_plugin}:{dst_target}", fg="cyan")
 
-    # Fetch and transform
-    src_tasks = [src.to_cif(r) for r in src.fetch_raw(src_target)]
-    dst_tasks = [dst.to_cif(r) for r in dst.fetch_raw(dst_target)]
+    # Fetch and transform both sides at once, the same way sync does; each is mostly waiting on its backend
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        fetch_src, fetch_dst = pool.submit(fetch_tasks, src), pool.submit(fetch_tasks, dst)
+        src_tasks = list(fetch_src.result()[0].values())
+        dst_tasks = list(fetch_dst.result()[0].values())
+
+    # Links and states are queued and written in one transaction; quitting keeps the links made so far
+    mgr.begin_batch()
+    try:
+        _match_tasks(mgr, input_plugin, output_plugin, src_tasks, dst_tasks)
+    finally:
+        mgr.flush_batch()
+        # New links change what the next sync has to do even though no task changed
+        mgr.clear_cursors()
 
+    typer.secho("\n✨ Reconciliation complete. Database is now seeded.", bold=True, fg="magenta")
+
+
+def _match_tasks(mgr: MappingManager, p1: str, p2: str, src_tasks: List[TaskCIR], dst_tasks: List[TaskCIR]) -> None:
+    """Links each source task to a hash-identical destination task, or to one the user picks."""
     linked_dst_ids: Set[str] = set()
+    # Pairs linked by an earlier run are kept as they are; both id maps are read in one query each
+    uid_by_src = mgr.load_id_map(p1)
+    dst_by_uid = mgr.reverse_map([p2])[p2]
+    fetched_dst = {d.tool_uid for d in dst_tasks}
+    already_linked: Set[str] = set()
+    for s_task in src_tasks:
+        dst_id = dst_by_uid.get(uid_by_src.get(s_task.tool_uid, ""))
+        if dst_id in fetched_dst:
+            already_linked.add(s_task.tool_uid)
+            linked_dst_ids.add(dst_id)
+
+    # Indexed once: hash lookups replace a scan of dst_tasks per source task
+    dst_by_hash: Dict[str, List[TaskCIR]] = {}
+    for d in dst_tasks:
+        dst_by_hash.setdefault(d.get_content_hash(), []).append(d)
+    dst_lower = [(d, d.description.lower()) for d in dst_tasks]
 
     for s_task in src_tasks:
+        if s_task.tool_uid in already_linked:
+            continue
         s_hash = s_task.get_content_hash()
 
         # 1. Automatic Hash Match
-        match = next(
-            (d for d in dst_tasks if d.tool_uid not in linked_dst_ids and d.get_content_hash() == s_hash), None
-        )
+        match = next((d for d in dst_by_hash.get(s_hash, ()) if d.tool_uid not in linked_dst_ids), None)
 
         if match:
-            _perform_link(mgr, input_plugin, output_plugin, s_task, match)
+            _perform_link(mgr, p1, p2, s_task, match)
             linked_dst_ids.add(match.tool_uid)
             typer.secho(f"✅ Auto-linked: {s_task.description}", fg="green")
             continue
 
         # 2. Manual Interactive Match
+        s_lower = s_task.description.lower()
         candidates = [
             d
-            for d in dst_tasks
-            if d.tool_uid not in linked_dst_ids
-            and (
-                s_task.description.lower() in d.description.lower()
-                or d.description.lower() in s_task.description.lower()
-            )
+            for d, d_lower in dst_lower
+            if d.tool_uid not in linked_dst_ids and (s_lower in d_lower or d_lower in s_lower)
         ]
 
         if not candidates:
@@ -84,8 +118,6 @@ def main(
             raise typer.Abort()
         if choice.isdigit() and int(choice) < len(candidates):
             selected = candidates[int(choice)]
-            _perform_link(mgr, input_plugin, output_plugin, s_task, selected)
+            _perform_link(mgr, p1, p2, s_task, selected)
             linked_dst_ids.add(selected.tool_uid)
             typer.secho(f"🔗 Linked: {s_task.description}", fg="blue")
-
-    typer.secho("\n✨ Reconciliation complete. Database is now seeded.", bold=True, fg="magenta")
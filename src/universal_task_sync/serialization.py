@@ -1,13 +1,14 @@
+import dataclasses
 import json
-import re
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Optional, Union
 
-# ISO 8601 Duration regex: P[n]DT[n]H[n]M[n]S
-ISO_8601_DURATION_RE = re.compile(
-    r"^P(?:(?P<days>\d+)D)?T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?$"
-)
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, stdlib json is the fallback
+    orjson = None  # type: ignore[assignment]
 
 
 class TaskJSONEncoder(json.JSONEncoder):
@@ -16,6 +17,7 @@ class TaskJSONEncoder(json.JSONEncoder):
     - datetimes -> ISO 8601 strings
     - timedeltas -> ISO 8601 duration strings
     - Enums -> their underlying values
+    - dataclasses (e.g. TaskCIR) -> dicts of their fields, as orjson does natively
     """
 
     def default(self, obj: Any) -> Any:
@@ -24,36 +26,95 @@ class TaskJSONEncoder(json.JSONEncoder):
 
         if isinstance(obj, timedelta):
             # Formats to P[d]DT[h]H[m]M[s]S
-            days = obj.days
-            hours = obj.seconds // 3600
-            minutes = (obj.seconds // 60) % 60
-            seconds = obj.seconds % 60
-            return f"P{days}DT{hours}H{minutes}M{seconds}S"
+            hours, rest = divmod(obj.seconds, 3600)
+            minutes, seconds = divmod(rest, 60)
+            return f"P{obj.days}DT{hours}H{minutes}M{seconds}S"
 
         if isinstance(obj, Enum):
             return obj.value
 
+        if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+
         return super().default(obj)
 
 
+@lru_cache(maxsize=1024)
 def parse_iso_duration(duration_str: str) -> Optional[timedelta]:
-    """Parses ISO 8601 duration strings back to timedelta."""
-    if not duration_str or duration_str == "None":
+    """
+    Parses ISO 8601 duration strings of the form P[n]DT[n]H[n]M[n]S (as
+    TaskJSONEncoder writes them) back to timedelta; anything else gives None.
+    Scanned with str.partition rather than a regex; durations repeat across
+    tasks, so results are cached.
+    """
+    if not duration_str or duration_str[0] != "P":
+        return None
+    day_part, sep, rest = duration_str[1:].partition("T")
+    if not sep:
         return None
 
-    match = ISO_8601_DURATION_RE.match(duration_str)
-    if not match:
+    days = 0
+    if day_part:
+        if day_part[-1] != "D" or not day_part[:-1].isdecimal():
+            return None
+        days = int(day_part[:-1])
+
+    # Each of H, M, S is optional but they come in that order; a part that
+    # is not a plain number means the units were out of order or repeated
+    units = []
+    for unit in "HMS":
+        number, found, tail = rest.partition(unit)
+        if not found:
+            units.append(0)
+            continue
+        if not number.isdecimal():
+            return None
+        units.append(int(number))
+        rest = tail
+    if rest:
         return None
 
-    parts = {k: int(v) for k, v in match.groupdict().items() if v}
-    return timedelta(**parts)
+    hours, minutes, seconds = units
+    return timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
 
 
+@lru_cache(maxsize=1024)
 def parse_iso_datetime(dt_str: str) -> Optional[datetime]:
-    """Parses ISO 8601 datetime strings back to datetime objects."""
+    """
+    Parses ISO 8601 datetime strings back to datetime objects.
+    Cached: the same due/scheduled dates turn up across many tasks, and datetimes are immutable.
+    """
     if not dt_str or dt_str == "None":
         return None
     try:
         return datetime.fromisoformat(dt_str)
     except ValueError:
         return None
+
+
+_ENCODER = TaskJSONEncoder()
+
+
+def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serializes to UTF-8 JSON bytes.
+    Uses orjson when installed and falls back to TaskJSONEncoder otherwise.
+    """
+    if orjson is not None:
+        option = (orjson.OPT_INDENT_2 if indent else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_ENCODER.default, option=option)
+    return json.dumps(
+        obj,
+        cls=TaskJSONEncoder,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+        ensure_ascii=False,
+    ).encode()
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """Parses JSON from bytes or str, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)